@@ -0,0 +1,97 @@
+"""Background worker for the graph analyzer.
+
+Runs the analysis stages off the Qt GUI thread and streams each result back
+through signals as soon as it is ready, so the plot appears first and the
+slower symbolic stages fill in afterwards.
+"""
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class StageTimeout(Exception):
+    """Raised when an analysis stage runs past its time budget"""
+
+
+class StageCancelled(Exception):
+    """Raised when the analysis is cancelled while a stage is running"""
+
+
+def run_with_budget(func, budget, cancel_event, poll_interval=0.05):
+    """Run func on a daemon thread and wait at most budget seconds for it
+
+    A stage that overruns or is cancelled is abandoned: its thread finishes
+    in the background and the result is discarded. Daemon threads never
+    block the application from exiting.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, name="analysis-stage", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + budget
+    while thread.is_alive():
+        if cancel_event.is_set():
+            raise StageCancelled()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise StageTimeout(f"timed out after {budget:g}s")
+        thread.join(min(poll_interval, remaining))
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+
+class AnalysisWorker(QThread):
+    """Runs a list of (name, callable) analysis stages in order
+
+    Each stage gets its own time budget. Results are emitted one by one via
+    stage_finished, failures and timeouts via stage_failed, and
+    analysis_finished reports whether the run was cancelled.
+    """
+
+    progress = pyqtSignal(int, str)
+    stage_finished = pyqtSignal(str, object)
+    stage_failed = pyqtSignal(str, str)
+    analysis_finished = pyqtSignal(bool)
+
+    def __init__(self, stages, stage_budget=5.0):
+        super().__init__()
+        self.stages = list(stages)
+        self.stage_budget = stage_budget
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Ask the worker to abandon the current stage and stop"""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        """True once cancel() has been called"""
+        return self._cancel_event.is_set()
+
+    def run(self):
+        """Run every stage in order, emitting results as they finish"""
+        total = len(self.stages)
+        for index, (name, func) in enumerate(self.stages):
+            if self.is_cancelled():
+                break
+            self.progress.emit(int(100 * index / total), name)
+            try:
+                result = run_with_budget(func, self.stage_budget, self._cancel_event)
+            except StageCancelled:
+                break
+            except Exception as e:
+                self.stage_failed.emit(name, str(e))
+                continue
+            if self.is_cancelled():
+                break
+            self.stage_finished.emit(name, result)
+        else:
+            self.progress.emit(100, "done")
+        self.analysis_finished.emit(self.is_cancelled())
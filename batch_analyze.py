@@ -0,0 +1,191 @@
+"""Command-line batch analysis of functions, e.g. for worksheet answer keys.
+
+Reads one function spec per JSONL line or CSV row and writes one JSONL
+result per spec, in input order, using the same FunctionAnalyzer as the
+graph screen. Specs are analysed in parallel worker processes, each with a
+hard per-item timeout; within an item, each symbolic solve or limit has a
+shorter limit of its own and falls back to the numeric result. Every result records the index of its input spec
+and is flushed as soon as it is written, so an interrupted run can be
+continued with --resume.
+
+Spec fields (only "function" is required):
+    function    expression in x, e.g. "x**3 - 3*x"
+    x_min/x_max analysis range (default -10 to 10, as on the graph screen)
+    resolution  number of grid samples (default 2000)
+    degrees     read sin/cos/tan arguments in degrees (default true)
+    stages      list of stages to run (JSONL) or ';'-separated (CSV)
+    id          any identifier, copied to the output
+
+Usage:
+    python batch_analyze.py worksheet.jsonl -o answers.jsonl
+    python batch_analyze.py worksheet.csv -o answers.jsonl --timeout 20 --resume
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+from function_analyzer import STAGES
+from solver_service import SolverService, SolverTimeout, SolverError
+
+DEFAULT_SPEC = {'x_min': -10.0, 'x_max': 10.0, 'resolution': 2000, 'degrees': True}
+
+# Seconds allowed for each symbolic solve or limit, as on the graph screen
+DEFAULT_SOLVER_TIMEOUT = 2.0
+
+
+def read_specs(path, input_format=None):
+    """Yield raw spec dicts from a JSONL or CSV file"""
+    input_format = input_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='') as f:
+        if input_format == 'csv':
+            for row in csv.DictReader(f):
+                yield {key.strip(): value.strip() for key, value in row.items()
+                       if key and value is not None and value.strip()}
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Reported as an error record for this line
+                        yield None
+
+
+def normalize_spec(raw):
+    """Validate a raw spec and fill in defaults, raising ValueError if it is unusable"""
+    if not isinstance(raw, dict) or not str(raw.get('function', '')).strip():
+        raise ValueError("spec is not an object with a 'function'")
+    spec = dict(DEFAULT_SPEC)
+    spec['function'] = str(raw['function']).strip()
+    try:
+        for key in ('x_min', 'x_max'):
+            if key in raw:
+                spec[key] = float(raw[key])
+        if 'resolution' in raw:
+            spec['resolution'] = int(raw['resolution'])
+    except (TypeError, ValueError):
+        raise ValueError("x_min, x_max and resolution must be numbers")
+    if spec['x_min'] >= spec['x_max']:
+        raise ValueError("x_min must be less than x_max")
+    if 'degrees' in raw:
+        degrees = raw['degrees']
+        spec['degrees'] = (degrees if isinstance(degrees, bool)
+                           else str(degrees).lower() in ('1', 'true', 'yes', 'deg', 'degrees'))
+    stages = raw.get('stages', STAGES)
+    if isinstance(stages, str):
+        stages = [stage.strip() for stage in stages.split(';') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"unknown stages: {', '.join(unknown)}")
+    spec['stages'] = list(stages)
+    return spec
+
+
+def completed_indices(path):
+    """Indices already written to an output file, dropping a truncated last line"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'rb+') as f:
+        data = f.read()
+        # A run killed mid-write leaves a partial last line; cut it off
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            done.add(json.loads(line)['index'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return done
+
+
+def analyze_one(service, index, raw, timeout, solver_timeout=DEFAULT_SOLVER_TIMEOUT):
+    """Analyse one raw spec in a worker process, returning its output record"""
+    record = {'index': index}
+    if isinstance(raw, dict) and 'id' in raw:
+        record['id'] = raw['id']
+    try:
+        spec = normalize_spec(raw)
+    except ValueError as e:
+        record['error'] = str(e)
+        return record
+    options = {key: spec[key] for key in ('resolution', 'degrees', 'stages')}
+    try:
+        record.update(service.analyze(spec['function'], spec['x_min'], spec['x_max'],
+                                      timeout=timeout, solver_timeout=solver_timeout, **options))
+    except SolverTimeout:
+        record.update(function=spec['function'], error=f"timed out after {timeout:g}s")
+    except SolverError as e:
+        record.update(function=spec['function'], error=str(e))
+    return record
+
+
+def run_batch(specs, output, workers, timeout, skip=(), solver_timeout=DEFAULT_SOLVER_TIMEOUT):
+    """Analyse specs in parallel and write results to output in input order
+
+    Returns (written, failed) counts.
+    """
+    service = SolverService(workers=workers, timeout=timeout)
+    pending = [(index, raw) for index, raw in enumerate(specs) if index not in skip]
+    written = failed = 0
+    pool = ThreadPool(workers)
+    try:
+        # imap yields in input order while up to `workers` items run at once
+        records = pool.imap(
+            lambda item: analyze_one(service, item[0], item[1], timeout, solver_timeout), pending)
+        for record in records:
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            written += 1
+            failed += 'error' in record
+    finally:
+        pool.terminate()
+        service.shutdown()
+    return written, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse many functions and write JSONL results.")
+    parser.add_argument('input', help="JSONL or CSV file of function specs")
+    parser.add_argument('-o', '--output', help="JSONL output file (default: standard output)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help="input format (default: from the file extension)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help="seconds allowed per function (default: 30)")
+    parser.add_argument('--solver-timeout', type=float, default=DEFAULT_SOLVER_TIMEOUT,
+                        help="seconds allowed for each symbolic solve or limit before "
+                             "falling back to numeric results (default: 2)")
+    parser.add_argument('--resume', action='store_true',
+                        help="skip specs already in the output file and append the rest")
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+    try:
+        specs = list(read_specs(args.input, args.format))
+    except (OSError, csv.Error) as e:
+        parser.error(f"could not read {args.input}: {e}")
+
+    skip = completed_indices(args.output) if args.resume else set()
+    start = time.monotonic()
+    if args.output:
+        with open(args.output, 'a' if args.resume else 'w') as output:
+            written, failed = run_batch(specs, output, args.workers, args.timeout, skip,
+                                        args.solver_timeout)
+    else:
+        written, failed = run_batch(specs, sys.stdout, args.workers, args.timeout, skip,
+                                    args.solver_timeout)
+    print(f"Analysed {written} of {len(specs)} functions ({len(skip)} resumed, {failed} failed) "
+          f"in {time.monotonic() - start:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
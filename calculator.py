@@ -1,25 +1,126 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QLineEdit, QTextEdit, QMessageBox, 
-                             QGridLayout, QComboBox, QScrollArea, QSlider,
-                             QSpinBox, QDoubleSpinBox, QTabWidget, QFrame)
+                             QGridLayout, QComboBox, QSlider,
+                             QSpinBox, QDoubleSpinBox,
+                             QProgressBar, QTableView, QHeaderView, QFileDialog,
+                             QPlainTextEdit)
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 import math
+import time
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 import sympy as sp
-from sympy import symbols, solve, diff, integrate
-import json
 import traceback
-import re
+from multiprocessing.pool import ThreadPool
+from function_engine import (ExpressionCache, CurveFamily, TileCache, parse_parameter_range,
+                             free_parameters, ParametricCurve, ImplicitCurve, SurfaceGridCache,
+                             parse_function, MAX_SLIDERS)
+from function_analyzer import FunctionAnalyzer, AnalysisResult, is_valid_number
+from numeric_methods import gauss_kronrod
+from expression_compiler import ExpressionCompiler, ExpressionError, number, EXACT, ResultSummary, full_text
+from value_table import table_grid, ValueTableModel, CsvExportWorker
+from graph_canvas import GraphCanvas, GraphViewport, SurfaceCanvas
+from analysis_worker import AnalysisWorker
+from solver_service import SolverService, SolverError
 
 class Calculator:
+    # Result labels for each graph analysis stage
+    ANALYSIS_STAGE_LABELS = {
+        'plot': "Plot",
+        'roots': "Roots",
+        'turning_points': "Turning Points",
+        'asymptotes': "Asymptotes",
+        'domain_range': "Domain/Range",
+        'behavior': "Behavior Analysis",
+    }
+    # Value range and resolution of the graph screen's parameter sliders
+    SLIDER_RANGE = (-10.0, 10.0)
+    SLIDER_STEPS = 200
+    # All-purpose calculator preview: pause after a keystroke before evaluating (ms), how long
+    # the GUI waits for the result before showing it as pending (ms), and the worker's limit (s)
+    PREVIEW_DELAY_MS = 150
+    PREVIEW_BUDGET_MS = 20
+    PREVIEW_TIMEOUT = 5.0
+    # Precision modes of the all-purpose calculator, and the range of significant digits
+    PRECISION_MODES = ("Standard", "Exact fractions", "Significant digits")
+    PRECISION_DIGITS = (16, 1000)
+    # Long exact results: digits per line when shown in full, and the conversion's time limit (s)
+    DIGITS_PER_LINE = 100
+    FULL_RESULT_TIMEOUT = 60.0
+    # Graph screen modes: (input prompt, examples, default input, default range, range label).
+    # Trig arguments and polar angles are read in degrees, like the rest of the graph screen
+    GRAPH_MODES = {
+        "y = f(x)": ("Enter function (e.g., x**2, sin(x), x**3 - 2*x), or several separated by ';':",
+                     ["x**2 - 4", "x**3 - 3*x", "sin(x)", "1/x", "exp(x)"],
+                     "x**2 - 4", ("-10", "10"), "X range:"),
+        "Parametric x(t), y(t)": ("Enter x(t); y(t), e.g. cos(t); sin(t) (t in degrees):",
+                                  ["cos(t); sin(t)", "2*cos(t); sin(t)", "cos(3*t); sin(2*t)",
+                                   "cos(t)**3; sin(t)**3", "t/360; (t/360)**2"],
+                                  "cos(t); sin(t)", ("0", "360"), "t range:"),
+        "Polar r(θ)": ("Enter r(θ), e.g. 1 + cos(theta) (θ in degrees):",
+                       ["1 + cos(theta)", "cos(3*theta)", "2", "theta/360", "1 + 2*sin(theta)"],
+                       "1 + cos(theta)", ("0", "360"), "θ range:"),
+        "Implicit F(x, y) = 0": ("Enter an equation in x and y, e.g. x**2 + y**2 = 25:",
+                                 ["x**2 + y**2 = 25", "x**2/16 + y**2/4 = 1", "x**2 - y**2 = 4",
+                                  "y**2 = x**3 - x", "x*y = 1"],
+                                 "x**2 + y**2 = 25", ("-10", "10"), "X and Y range:"),
+        "Surface z = f(x, y)": ("Enter z as a function of x and y, e.g. x**2 - y**2:",
+                                ["x**2 + y**2", "x**2 - y**2", "x*y", "exp(-(x**2 + y**2)/10)",
+                                 "sin(20*x)*cos(20*y)"],
+                                "x**2 - y**2", ("-10", "10"), "X and Y range:"),
+    }
+    
     def __init__(self, parent_app):
         self.parent_app = parent_app
         self.calculation_history = []
         self.user_variables = {}
+        # Parsed/compiled functions shared by the graph and function tools
+        self.expression_cache = ExpressionCache()
+        # Safe compiled evaluator behind the calculator and the value tools
+        self.expression_compiler = ExpressionCompiler()
+        # Background graph analysis (see start_analysis)
+        self.analysis_worker = None
+        self.analysis_workers = set()
+        self.analysis_stage_budget = 5.0  # seconds per analysis stage
+        self.plot_point_budget = 4000  # max points in an adaptively sampled curve
+        self.graph_canvas = None
+        self.graph_viewport = None
+        self.graph_family = None
+        self.surface_canvas = None
+        self.integral_canvas = None
+        self.integral_worker = None
+        self.derivative_canvas = None
+        self.export_workers = set()
+        # Live result preview of the all-purpose calculator (see schedule_preview)
+        self.preview_worker = None
+        self.preview_cancel = None
+        self.preview_label = None
+        self.preview_timer = QTimer()
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+        # Last exact result too long to show in full, and the worker converting its digits
+        self.long_result = None
+        self.digits_worker = None
+        # Sampled z = f(x, y) grids, so restyling or re-plotting a surface never re-evaluates it
+        self.surface_cache = SurfaceGridCache()
+        # Live sliders for free parameters such as a, b, c in a*sin(b*x)+c
+        self.parameter_sliders = {}
+        self.slider_values = {}
+        # Re-analyze shortly after a slider is moved with the keyboard or wheel
+        self.slider_timer = QTimer()
+        self.slider_timer.setSingleShot(True)
+        self.slider_timer.setInterval(300)
+        self.slider_timer.timeout.connect(self.plot_function)
+        # Threads that analyse overlaid curves side by side (see map_curves)
+        self.analysis_pool = None
+        # Worker processes for time-limited sp.solve/sp.limit calls, started
+        # by the first screen that needs them, since a call's timeout
+        # includes their startup
+        self.solver_service = SolverService(workers=4, timeout=2.0)
+        # Qt-free analysis of the graph screen's functions
+        self.analyzer = FunctionAnalyzer(self.solver_service, self.expression_cache)
         self.current_topic = None
         
         # Comprehensive topic formulas for all topics
@@ -1087,6 +1188,12 @@ class Calculator:
         
     def show_calculator_menu(self):
         """Show calculator selection menu"""
+        self.cancel_analysis()
+        self.cancel_preview()
+        self.digits_worker = None
+        self.slider_timer.stop()
+        self.release_graph_canvas()
+        self.graph_family = None
         self.parent_app.clear_layout()
         
         # Title
@@ -1248,8 +1355,45 @@ class Calculator:
         self.display_var.setText("0")
         self.display_var.setFont(QFont("Arial", 24))
         self.display_var.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.display_var.textChanged.connect(self.schedule_preview)
         display_layout.addWidget(self.display_var)
         
+        # Live preview of the result, updated shortly after each keystroke
+        self.preview_label = QLabel("")
+        self.preview_label.setFont(QFont("Arial", 16))
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.preview_label.setStyleSheet("color: gray;")
+        display_layout.addWidget(self.preview_label)
+        
+        # Every digit of a very long exact result, converted only when asked for
+        self.long_result = None
+        self.full_result_button = QPushButton("Show All Digits")
+        self.full_result_button.clicked.connect(self.show_full_result)
+        self.full_result_button.hide()
+        display_layout.addWidget(self.full_result_button)
+        self.full_result_text = QPlainTextEdit()
+        self.full_result_text.setReadOnly(True)
+        self.full_result_text.setMaximumHeight(150)
+        self.full_result_text.hide()
+        display_layout.addWidget(self.full_result_text)
+        
+        # Precision: floating point, exact fractions or a chosen number of significant digits
+        precision_layout = QHBoxLayout()
+        precision_layout.addWidget(QLabel("Precision:"))
+        self.precision_mode_var = QComboBox()
+        self.precision_mode_var.addItems(self.PRECISION_MODES)
+        self.precision_mode_var.currentTextChanged.connect(self.on_precision_changed)
+        precision_layout.addWidget(self.precision_mode_var)
+        self.precision_digits_var = QSpinBox()
+        self.precision_digits_var.setRange(*self.PRECISION_DIGITS)
+        self.precision_digits_var.setValue(50)
+        self.precision_digits_var.setSuffix(" digits")
+        self.precision_digits_var.setEnabled(False)
+        self.precision_digits_var.valueChanged.connect(self.schedule_preview)
+        precision_layout.addWidget(self.precision_digits_var)
+        precision_layout.addStretch()
+        display_layout.addLayout(precision_layout)
+        
         self.parent_app.main_layout.addWidget(display_widget)
         
         # Buttons grid
@@ -1309,34 +1453,196 @@ class Calculator:
             else:
                 self.display_var.setText("0")
         elif button_text == '=':
-            try:
-                # Replace symbols with operators
-                expression = current.replace('×', '*').replace('÷', '/').replace('^', '**')
-                result = eval(expression)
-                self.display_var.setText(str(result))
-                
-                # Add to history
-                self.add_to_history(f"{current} = {result}")
-                
-            except Exception as e:
-                QMessageBox.critical(self.parent_app, "Error", f"Invalid expression: {e}")
+            self.evaluate_display(current, current)
         elif button_text == '±':
             if current.startswith('-'):
                 self.display_var.setText(current[1:])
             else:
                 self.display_var.setText('-' + current)
         elif button_text == '√':
-            try:
-                result = math.sqrt(float(current))
-                self.display_var.setText(str(result))
-                self.add_to_history(f"√{current} = {result}")
-            except:
-                QMessageBox.critical(self.parent_app, "Error", "Invalid input for square root")
+            self.evaluate_display(f"sqrt({current})", f"√({current})")
         else:
             if current == "0" and button_text not in ['.', '(', ')']:
                 self.display_var.setText(button_text)
             else:
                 self.display_var.setText(current + button_text)
+    
+    def calculator_precision(self):
+        """Precision chosen on the all-purpose calculator: None (floating point), EXACT or digits"""
+        mode = self.precision_mode_var.currentText()
+        if mode == "Exact fractions":
+            return EXACT
+        if mode == "Significant digits":
+            return self.precision_digits_var.value()
+        return None
+    
+    def on_precision_changed(self):
+        """Enable the digits box in significant-digits mode and refresh the preview"""
+        self.precision_digits_var.setEnabled(self.precision_mode_var.currentText() == "Significant digits")
+        if self.calculator_precision() is not None:
+            # Exact and high-precision results are evaluated in the solver processes
+            self.solver_service.start()
+        self.schedule_preview()
+    
+    def evaluate_display(self, text, label):
+        """Evaluate text for '=' or '√', putting the result in the display and history"""
+        self.cancel_preview()
+        try:
+            self.start_evaluation(text, label)
+        except ExpressionError as e:
+            QMessageBox.critical(self.parent_app, "Error", f"Invalid expression: {e}")
+    
+    def start_evaluation(self, text, label=None):
+        """Evaluate text at the calculator's precision without ever blocking typing
+        
+        Compilation is cached per precision and evaluation runs on a worker. The
+        GUI waits only PREVIEW_BUDGET_MS for it; a slower result shows as pending
+        and fills in when ready, unless the input changes first and the worker is
+        cancelled. With a label the result is entered ('=' or '√'), otherwise it
+        is only previewed. Raises ExpressionError if text does not compile.
+        The worker also formats the result, which for a huge exact number can
+        take as long as computing it.
+        
+        Floating point cannot run long, so it is evaluated on the worker thread
+        itself. Exact and significant-digits arithmetic can (factorial(200000)),
+        and a thread cannot be stopped, so it runs in a solver process instead,
+        which cancelling terminates at once.
+        """
+        precision = self.calculator_precision()
+        formula = self.expression_compiler.compile(text, precision=precision)
+        if precision is None:
+            evaluate = lambda: ResultSummary(formula())
+        else:
+            cancel = self.preview_cancel = threading.Event()
+            
+            def evaluate():
+                try:
+                    return self.solver_service.evaluate(
+                        formula.text, precision, timeout=self.PREVIEW_TIMEOUT, cancel=cancel)
+                except SolverError as e:
+                    # Reported as 'ExpressionError: reason'; show just the reason
+                    raise ExpressionError(str(e).split(': ', 1)[-1])
+        worker = AnalysisWorker([('evaluate', evaluate)], self.PREVIEW_TIMEOUT + 1.0)
+        worker.stage_finished.connect(
+            lambda stage, result, w=worker: self.on_evaluation_finished(w, label, result))
+        worker.stage_failed.connect(
+            lambda stage, reason, w=worker: self.on_evaluation_failed(w, label, reason))
+        self.analysis_workers.add(worker)
+        worker.finished.connect(lambda w=worker: self.analysis_workers.discard(w))
+        self.preview_worker = worker
+        worker.start()
+        if not worker.wait(self.PREVIEW_BUDGET_MS):
+            self.preview_label.setText("= …")
+    
+    def schedule_preview(self):
+        """Restart the preview delay; called on every change to the display"""
+        self.cancel_preview()
+        self.preview_timer.start()
+    
+    def cancel_preview(self):
+        """Stop the pending preview and abandon any evaluation still running"""
+        self.preview_timer.stop()
+        if self.preview_cancel is not None:
+            self.preview_cancel.set()
+            self.preview_cancel = None
+        if self.preview_worker is not None:
+            self.preview_worker.cancel()
+            self.preview_worker = None
+    
+    def update_preview(self):
+        """Preview the result of the display as it is typed"""
+        text = self.display_var.text()
+        try:
+            float(text)
+            # A plain number previews as itself, so leave the line empty
+            self.preview_label.setText("")
+            return
+        except ValueError:
+            pass
+        try:
+            self.start_evaluation(text)
+        except ExpressionError:
+            # Usually half-typed input such as '2+'; stay quiet until it parses
+            self.preview_label.setText("")
+    
+    def on_evaluation_finished(self, worker, label, summary):
+        """Show a finished result, unless the input has changed since"""
+        if worker is not self.preview_worker:
+            return
+        self.preview_worker = None
+        if summary.error is not None:
+            if label is None:
+                self.preview_label.setText(f"({summary.error})")
+            else:
+                self.preview_label.setText("")
+                QMessageBox.critical(self.parent_app, "Error", f"Invalid expression: {summary.error}")
+            return
+        if label is None:
+            self.preview_label.setText(f"= {summary.text}")
+            return
+        
+        calculation = f"{label} = {summary.text}"
+        if summary.approximation is not None:
+            # Exact answers such as 3/10 or sqrt(2) also get their decimal value
+            calculation += f" ≈ {summary.approximation}"
+        self.display_var.setText(summary.text)
+        self.add_to_history(calculation)
+        
+        # A very long exact result is shown rounded; its digits are converted on request
+        self.long_result = summary.long_value
+        self.digits_worker = None
+        self.full_result_text.hide()
+        self.full_result_button.setVisible(self.long_result is not None)
+        if self.long_result is not None:
+            self.full_result_button.setText(f"Show All Digits (about {summary.digits:,})")
+            self.full_result_button.setEnabled(True)
+    
+    def on_evaluation_failed(self, worker, label, reason):
+        """Report an evaluation that was refused or ran out of time"""
+        if worker is not self.preview_worker:
+            return
+        self.preview_worker = None
+        if label is None:
+            self.preview_label.setText(f"({reason})")
+        else:
+            self.preview_label.setText("")
+            QMessageBox.critical(self.parent_app, "Error", f"Could not evaluate {label}: {reason}")
+    
+    def show_full_result(self):
+        """Convert every digit of the long result on a worker, then show them"""
+        if self.long_result is None:
+            return
+        value = self.long_result
+        
+        def digits_text():
+            text = full_text(value)
+            # Fixed-length lines lay out far faster than one enormous line
+            return '\n'.join(text[i:i + self.DIGITS_PER_LINE]
+                             for i in range(0, len(text), self.DIGITS_PER_LINE))
+        
+        worker = AnalysisWorker([('digits', digits_text)], self.FULL_RESULT_TIMEOUT)
+        worker.stage_finished.connect(
+            lambda stage, text, w=worker: self.on_full_result_ready(w, text))
+        worker.stage_failed.connect(
+            lambda stage, reason, w=worker: self.on_full_result_ready(w, None))
+        self.analysis_workers.add(worker)
+        worker.finished.connect(lambda w=worker: self.analysis_workers.discard(w))
+        self.digits_worker = worker
+        self.full_result_button.setEnabled(False)
+        self.full_result_button.setText("Converting...")
+        worker.start()
+    
+    def on_full_result_ready(self, worker, text):
+        """Show the converted digits of the long result (None if the conversion failed)"""
+        if worker is not self.digits_worker:
+            return
+        self.digits_worker = None
+        if text is None:
+            self.full_result_button.setText("Could not convert the digits")
+            return
+        self.full_result_button.hide()
+        self.full_result_text.setPlainText(text)
+        self.full_result_text.show()
                 
     def add_to_history(self, calculation):
         """Add calculation to history"""
@@ -1749,6 +2055,10 @@ class Calculator:
     def show_graphical_calculator(self):
         """Show enhanced graphical calculator with function analysis"""
         self.parent_app.clear_layout()
+        # Warm up the solver processes before the first analysis needs them
+        self.solver_service.start()
+        if self.analysis_pool is None:
+            self.analysis_pool = ThreadPool(self.solver_service.workers)
         
         # Title
         title_label = QLabel("Function Graph Generator & Analyzer")
@@ -1760,27 +2070,32 @@ class Calculator:
         input_widget = QWidget()
         input_layout = QVBoxLayout(input_widget)
         
+        # Graph mode
+        mode_widget = QWidget()
+        mode_layout = QHBoxLayout(mode_widget)
+        mode_layout.addWidget(QLabel("Graph type:"))
+        self.graph_mode_var = QComboBox()
+        self.graph_mode_var.addItems(list(self.GRAPH_MODES))
+        mode_layout.addWidget(self.graph_mode_var)
+        self.surface_style_var = QComboBox()
+        self.surface_style_var.addItems(list(SurfaceCanvas.STYLES))
+        self.surface_style_var.setEnabled(False)
+        mode_layout.addWidget(QLabel("Surface style:"))
+        mode_layout.addWidget(self.surface_style_var)
+        mode_layout.addStretch()
+        input_layout.addWidget(mode_widget)
+        
         # Function input
-        function_label = QLabel("Enter function (e.g., x**2, sin(x), x**3 - 2*x):")
-        function_label.setFont(QFont("Arial", 12, QFont.Bold))
-        input_layout.addWidget(function_label)
+        self.function_label = QLabel()
+        self.function_label.setFont(QFont("Arial", 12, QFont.Bold))
+        input_layout.addWidget(self.function_label)
         
-        # Example functions
+        # Example functions, rebuilt for each graph mode
         examples_widget = QWidget()
-        examples_layout = QHBoxLayout(examples_widget)
-        examples_layout.addWidget(QLabel("Examples:"))
-        
-        example_functions = ["x**2 - 4", "x**3 - 3*x", "sin(x)", "1/x", "exp(x)"]
-        for example in example_functions:
-            example_btn = QPushButton(example)
-            example_btn.setMaximumWidth(80)
-            example_btn.clicked.connect(lambda checked, ex=example: self.function_var.setText(ex))
-            examples_layout.addWidget(example_btn)
-        
+        self.examples_layout = QHBoxLayout(examples_widget)
         input_layout.addWidget(examples_widget)
         
         self.function_var = QLineEdit()
-        self.function_var.setText("x**2 - 4")
         self.function_var.setFont(QFont("Arial", 14))
         input_layout.addWidget(self.function_var)
         
@@ -1788,13 +2103,12 @@ class Calculator:
         range_widget = QWidget()
         range_layout = QHBoxLayout(range_widget)
         
-        # X range
-        x_range_label = QLabel("X range:")
-        x_range_label.setFont(QFont("Arial", 12, QFont.Bold))
-        range_layout.addWidget(x_range_label)
+        # X range (the t or θ range for parametric and polar curves)
+        self.x_range_label = QLabel()
+        self.x_range_label.setFont(QFont("Arial", 12, QFont.Bold))
+        range_layout.addWidget(self.x_range_label)
         
         self.x_min_var = QLineEdit()
-        self.x_min_var.setText("-10")
         self.x_min_var.setMaximumWidth(80)
         range_layout.addWidget(self.x_min_var)
         
@@ -1802,13 +2116,22 @@ class Calculator:
         range_layout.addWidget(x_max_label)
         
         self.x_max_var = QLineEdit()
-        self.x_max_var.setText("10")
         self.x_max_var.setMaximumWidth(80)
         range_layout.addWidget(self.x_max_var)
         
+        # Optional parameter: a function using it is plotted once per value
+        parameter_label = QLabel("Parameter:")
+        parameter_label.setFont(QFont("Arial", 12, QFont.Bold))
+        range_layout.addWidget(parameter_label)
+        
+        self.parameter_var = QLineEdit()
+        self.parameter_var.setPlaceholderText("optional, e.g. n = 1:8")
+        self.parameter_var.setMaximumWidth(200)
+        range_layout.addWidget(self.parameter_var)
+        
         input_layout.addWidget(range_widget)
         
-        # Analysis options
+        # Analysis options (y = f(x) only)
         options_widget = QWidget()
         options_layout = QHBoxLayout(options_widget)
         
@@ -1819,7 +2142,8 @@ class Calculator:
         options_layout.addWidget(self.show_roots_var)
         
         self.show_turning_points_var = QComboBox()
-        self.show_turning_points_var.addItems(["Find Turning Points", "Don't Find Turning Points"])
+        self.show_turning_points_var.addItems(["Find Turning Points", "Find Exact Turning Points",
+                                              "Don't Find Turning Points"])
         self.show_turning_points_var.setCurrentText("Find Turning Points")
         options_layout.addWidget(QLabel("Turning Points:"))
         options_layout.addWidget(self.show_turning_points_var)
@@ -1830,13 +2154,50 @@ class Calculator:
         options_layout.addWidget(QLabel("Asymptotes:"))
         options_layout.addWidget(self.show_asymptotes_var)
         
+        self.resolution_var = QSpinBox()
+        self.resolution_var.setRange(200, 20000)
+        self.resolution_var.setSingleStep(500)
+        self.resolution_var.setValue(2000)
+        options_layout.addWidget(QLabel("Samples:"))
+        options_layout.addWidget(self.resolution_var)
+        
         input_layout.addWidget(options_widget)
+        self.analysis_options_widget = options_widget
+        
+        # Parameter sliders, rebuilt whenever the plotted function's free symbols change
+        self.sliders_widget = QWidget()
+        self.sliders_layout = QHBoxLayout(self.sliders_widget)
+        self.sliders_widget.hide()
+        self.parameter_sliders = {}
+        input_layout.addWidget(self.sliders_widget)
         
         # Plot button
-        plot_button = QPushButton("Analyze & Plot Function")
-        plot_button.setFont(QFont("Arial", 14, QFont.Bold))
-        plot_button.clicked.connect(self.plot_function)
-        input_layout.addWidget(plot_button)
+        self.plot_button = QPushButton("Analyze & Plot Function")
+        self.plot_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.plot_button.clicked.connect(self.plot_function)
+        input_layout.addWidget(self.plot_button)
+        
+        # Symbolic analysis is not repeated while panning/zooming; this re-runs it
+        self.analyze_view_button = QPushButton("Analyze Current View")
+        self.analyze_view_button.setEnabled(False)
+        self.analyze_view_button.clicked.connect(self.analyze_current_view)
+        input_layout.addWidget(self.analyze_view_button)
+        
+        # Analysis progress and cancellation
+        progress_widget = QWidget()
+        progress_layout = QHBoxLayout(progress_widget)
+        
+        self.analysis_progress = QProgressBar()
+        self.analysis_progress.setRange(0, 100)
+        self.analysis_progress.setValue(0)
+        progress_layout.addWidget(self.analysis_progress)
+        
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.on_cancel_analysis_clicked)
+        progress_layout.addWidget(self.cancel_button)
+        
+        input_layout.addWidget(progress_widget)
         
         self.parent_app.main_layout.addWidget(input_widget)
         
@@ -1845,25 +2206,70 @@ class Calculator:
         self.results_layout = QVBoxLayout(self.results_frame)
         self.parent_app.main_layout.addWidget(self.results_frame)
         
-        # Graph frame
+        # Graph frame: one canvas for the lifetime of this screen, reused by every plot
         self.graph_frame = QWidget()
         self.graph_layout = QVBoxLayout(self.graph_frame)
+        self.graph_canvas = GraphCanvas()
+        self.graph_canvas.setToolTip("Drag to pan, scroll to zoom")
+        self.graph_layout.addWidget(self.graph_canvas)
+        self.graph_viewport = GraphViewport(self.graph_canvas, self.on_graph_view_changed)
+        # z = f(x, y) plots get their own canvas, shown in place of the curve canvas
+        self.surface_canvas = SurfaceCanvas()
+        self.surface_canvas.setToolTip("Drag to rotate a surface")
+        self.surface_canvas.hide()
+        self.graph_layout.addWidget(self.surface_canvas)
         self.parent_app.main_layout.addWidget(self.graph_frame)
         
+        self.graph_mode_var.currentTextChanged.connect(self.on_graph_mode_changed)
+        self.on_graph_mode_changed(self.graph_mode_var.currentText())
+        
         # Back button
         back_button = QPushButton("Back to Calculator Menu")
         back_button.clicked.connect(self.show_calculator_menu)
         self.parent_app.main_layout.addWidget(back_button)
         
+    def on_graph_mode_changed(self, mode):
+        """Switch the graph screen's inputs and examples to the selected graph type"""
+        prompt, examples, default, (low, high), range_label = self.GRAPH_MODES[mode]
+        self.function_label.setText(prompt)
+        self.x_range_label.setText(range_label)
+        self.function_var.setText(default)
+        self.x_min_var.setText(low)
+        self.x_max_var.setText(high)
+        
+        for widget in self.examples_layout.parentWidget().findChildren(QWidget):
+            widget.deleteLater()
+        self.examples_layout.addWidget(QLabel("Examples:"))
+        for example in examples:
+            example_btn = QPushButton(example)
+            example_btn.setMaximumWidth(140)
+            example_btn.clicked.connect(lambda checked, ex=example: self.function_var.setText(ex))
+            self.examples_layout.addWidget(example_btn)
+        
+        # Families, sliders and the analysis stages only apply to y = f(x)
+        function_mode = mode == "y = f(x)"
+        self.parameter_var.setEnabled(function_mode)
+        self.analysis_options_widget.setEnabled(function_mode)
+        if not function_mode:
+            self.update_parameter_sliders([])
+        surface_mode = mode.startswith("Surface")
+        self.surface_style_var.setEnabled(surface_mode)
+        self.surface_canvas.setVisible(surface_mode)
+        self.graph_canvas.setVisible(not surface_mode)
+    
+    def release_graph_canvas(self):
+        """Free the graph screen's figure when leaving the screen"""
+        if self.graph_canvas is not None:
+            self.graph_viewport.disconnect()
+            self.graph_canvas.release()
+            self.surface_canvas.release()
+            self.graph_canvas = None
+            self.graph_viewport = None
+            self.surface_canvas = None
+    
     def plot_function(self):
-        """Plot the function with comprehensive analysis"""
+        """Plot the function(s) and start their analysis on a background worker"""
         try:
-            # Clear previous results and plot
-            for widget in self.results_frame.findChildren(QWidget):
-                widget.deleteLater()
-            for widget in self.graph_frame.findChildren(QWidget):
-                widget.deleteLater()
-                
             # Get function and range
             function_str = self.function_var.text().strip()
             if not function_str:
@@ -1871,8 +2277,8 @@ class Calculator:
                 return
                 
             try:
-                x_min = float(self.x_min_var.text())
-                x_max = float(self.x_max_var.text())
+                x_min = number(self.x_min_var.text())
+                x_max = number(self.x_max_var.text())
             except ValueError:
                 QMessageBox.critical(self.parent_app, "Error", "Invalid range values. Please enter valid numbers.")
                 return
@@ -1881,302 +2287,403 @@ class Calculator:
                 QMessageBox.critical(self.parent_app, "Error", "X minimum must be less than X maximum")
                 return
             
-            # Preprocess function string for degrees in trig functions
-            # Replace sin(x) -> sin(radians(x)), etc.
-            def deg_replace(match):
-                func = match.group(1)
-                arg = match.group(2)
-                return f"{func}(math.radians({arg}))"
-            function_str_processed = re.sub(r"(sin|cos|tan)\(([^)]+)\)", deg_replace, function_str)
+            mode = self.graph_mode_var.currentText()
+            if mode.startswith("Surface"):
+                self.plot_surface(function_str, x_min, x_max)
+                return
+            if mode.startswith("Implicit"):
+                self.plot_implicit_curve(function_str, x_min, x_max)
+                return
+            if mode != "y = f(x)":
+                self.plot_parametric_curve(function_str, x_min, x_max, polar=mode.startswith("Polar"))
+                return
             
-            # Create sympy symbols and function
+            parameter_str = self.parameter_var.text().strip()
             try:
-                x_sym = symbols('x')
-                # Use math for trig in degrees
-                local_dict = {'sin': lambda x: math.sin(x),
-                              'cos': lambda x: math.cos(x),
-                              'tan': lambda x: math.tan(x),
-                              'exp': math.exp,
-                              'log': math.log,
-                              'sqrt': math.sqrt,
-                              'radians': math.radians,
-                              'pi': math.pi,
-                              'e': math.e}
-                f = sp.sympify(function_str_processed, locals=local_dict)
-            except Exception as e:
-                QMessageBox.critical(self.parent_app, "Error", f"Invalid function: {e}\n\nPlease use standard mathematical notation:\n- Use ** for powers (e.g., x**2)\n- Use * for multiplication (e.g., 2*x)\n- Use standard functions (sin, cos, exp, log)")
+                parameter = parse_parameter_range(parameter_str) if parameter_str else None
+            except ValueError as e:
+                QMessageBox.critical(self.parent_app, "Error", str(e))
                 return
             
-            # Create plot
-            fig, ax = plt.subplots(figsize=(12, 8))
-            x_plot = np.linspace(x_min, x_max, 2000)
-            x_plot_list = x_plot.tolist()  # Convert to Python list
-            
-            # Evaluate function for plotting (no finite/NaN checks)
-            y_plot = []
-            for xi in x_plot_list:
-                try:
-                    y_val = f.subs(x_sym, xi)
-                    y_val_float = float(y_val)
-                    y_plot.append(y_val_float)
-                except Exception:
-                    y_plot.append(float('nan'))
-            
-            # Plot the function for the full range, including NaN/infinite values
-            ax.plot(x_plot_list, y_plot, 'b-', linewidth=2, label=f'f(x) = {function_str}')
-            ax.grid(True, alpha=0.3)
-            ax.set_xlabel('x', fontsize=12)
-            ax.set_ylabel('y', fontsize=12)
-            ax.set_title(f'Function Analysis: f(x) = {function_str}', fontsize=14, fontweight='bold')
-            ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-            ax.axvline(x=0, color='k', linestyle='-', alpha=0.3)
-            
-            # Analysis results
-            analysis_results = []
-            
-            # Find y-intercept
+            # Parse each function (or reuse the cached parse), reading trig arguments
+            # in degrees, and sample them all together on one shared grid
+            function_strs = [part.strip() for part in function_str.split(';') if part.strip()]
             try:
-                y_intercept_expr = f.subs(x_sym, 0)
-                if hasattr(y_intercept_expr, 'is_real') and y_intercept_expr.is_real:
-                    y_intercept = float(y_intercept_expr)
-                    if self.is_valid_number(y_intercept):
-                        analysis_results.append(f"Y-intercept: (0, {y_intercept:.4f})")
-                        ax.plot([0], [y_intercept], 'go', markersize=8, label=f'Y-intercept: (0, {y_intercept:.4f})')
-                    else:
-                        analysis_results.append("Y-intercept: Not defined or infinite")
-                else:
-                    analysis_results.append("Y-intercept: Not defined or complex")
-            except (TypeError, ValueError, OverflowError):
-                analysis_results.append("Y-intercept: Not defined or complex")
-            
-            # Find roots if requested
-            if self.show_roots_var.currentText() == "Find Roots":
-                try:
-                    roots = self.find_roots(f, x_sym, x_min, x_max)
-                    if roots:
-                        analysis_results.append(f"Roots: {', '.join([f'({r:.4f}, 0)' for r in roots])}")
-                        for root in roots:
-                            if self.is_valid_number(root):
-                                ax.plot([root], [0], 'ro', markersize=8, label=f'Root: ({root:.4f}, 0)')
-                    else:
-                        analysis_results.append("Roots: No real roots found in range")
-                except Exception as e:
-                    analysis_results.append("Roots: Error in calculation")
-            
-            # Find turning points if requested
-            if self.show_turning_points_var.currentText() == "Find Turning Points":
-                try:
-                    turning_points = self.find_turning_points(f, x_sym, x_min, x_max)
-                    if turning_points:
-                        tp_text = []
-                        for tp in turning_points:
-                            x_val, y_val, tp_type = tp
-                            if self.is_valid_number(x_val) and self.is_valid_number(y_val):
-                                tp_text.append(f'({x_val:.4f}, {y_val:.4f}) [{tp_type}]')
-                                color = 'orange' if tp_type == 'Maximum' else 'purple'
-                                ax.plot([x_val], [y_val], 'o', color=color, markersize=8, 
-                                       label=f'{tp_type}: ({x_val:.4f}, {y_val:.4f})')
-                        if tp_text:
-                            analysis_results.append(f"Turning Points: {', '.join(tp_text)}")
-                    else:
-                        analysis_results.append("Turning Points: No turning points found in range")
-                except Exception as e:
-                    analysis_results.append("Turning Points: Error in calculation")
-            
-            # Find asymptotes if requested
-            if self.show_asymptotes_var.currentText() == "Find Asymptotes":
-                asymptotes = self.find_asymptotes(f, x_sym, x_min, x_max)
-                if asymptotes:
-                    for asym in asymptotes:
-                        if asym['type'] == 'vertical':
-                            ax.axvline(x=asym['value'], color='r', linestyle='--', alpha=0.7, 
-                                     label=f"Vertical asymptote: x = {asym['value']:.4f}")
-                            analysis_results.append(f"Vertical asymptote: x = {asym['value']:.4f}")
-                        elif asym['type'] == 'horizontal':
-                            ax.axhline(y=asym['value'], color='g', linestyle='--', alpha=0.7,
-                                     label=f"Horizontal asymptote: y = {asym['value']:.4f}")
-                            analysis_results.append(f"Horizontal asymptote: y = {asym['value']:.4f}")
-                else:
-                    analysis_results.append("Asymptotes: No asymptotes found")
+                exclude = [parameter[0]] if parameter is not None else []
+                slider_symbols = free_parameters(function_strs, exclude)
+                if len(slider_symbols) > MAX_SLIDERS:
+                    raise ValueError(f"at most {MAX_SLIDERS} parameters other than x are supported")
+                self.update_parameter_sliders(slider_symbols)
+                sliders = {symbol: self.slider_values[symbol.name] for symbol in slider_symbols}
+                family = CurveFamily(self.expression_cache, function_strs, x_min, x_max,
+                                     self.resolution_var.value(), parameter, sliders)
+            except Exception as e:
+                QMessageBox.critical(self.parent_app, "Error", f"Invalid function: {e}\n\nPlease use standard mathematical notation:\n- Use ** for powers (e.g., x**2)\n- Use * for multiplication (e.g., 2*x)\n- Use standard functions (sin, cos, exp, log)")
+                return
             
-            # Domain and range analysis
-            domain_range = self.analyze_domain_range(f, x_sym, x_min, x_max)
-            analysis_results.extend(domain_range)
+            # Abandon any analysis still running for a previous click
+            self.cancel_analysis()
             
-            # Additional analysis
-            behavior_analysis = self.analyze_function_behavior(f, x_sym, x_min, x_max)
-            analysis_results.extend(behavior_analysis)
+            # Clear previous results
+            for widget in self.results_frame.findChildren(QWidget):
+                widget.deleteLater()
             
-            # Add legend
-            ax.legend(loc='best', fontsize=10)
+            # Reset the canvas; the curve and analysis are drawn as each stage finishes
+            title = f'{function_str}, {parameter_str}' if parameter_str else function_str
+            self.graph_canvas.reset(f'Function Analysis: f(x) = {title}', x_min, x_max,
+                                    len(family.members))
+            self.graph_viewport.set_tile_caches([])
+            self.graph_family = family
+            self.graph_results = [AnalysisResult(label, x_min, x_max) for label in family.labels]
+            self.analyze_view_button.setEnabled(False)
             
-            # Create canvas
-            canvas = FigureCanvas(Figure(fig))
-            self.graph_layout.addWidget(canvas)
+            # Display analysis results as they arrive
+            self.display_analysis_results([])
             
-            # Display analysis results
-            self.display_analysis_results(analysis_results)
+            # Curves are analysed side by side, so the budget grows with the batches needed
+            batches = math.ceil(len(family.members) / self.solver_service.workers)
+            self.start_analysis(self.analysis_stages(family), self.analysis_stage_budget * batches)
                 
         except Exception as e:
             print(f"Detailed error: {traceback.format_exc()}")
             QMessageBox.critical(self.parent_app, "Error", f"Analysis error: {e}\n\nPlease check your function syntax and try again.")
     
-    def find_roots(self, f, x_sym, x_min, x_max):
-        """Find roots of the function in the given range"""
+    def plot_parametric_curve(self, curve_str, t_min, t_max, polar=False):
+        """Plot a parametric x(t); y(t) or polar r(θ) curve with its arc length and area"""
+        components = [part.strip() for part in curve_str.split(';') if part.strip()]
         try:
-            # Try to solve f(x) = 0
-            roots = sp.solve(f, x_sym)
-            real_roots = []
-            
-            for root in roots:
-                try:
-                    if hasattr(root, 'is_real') and root.is_real:
-                        root_val = float(root)
-                        if x_min <= root_val <= x_max:
-                            real_roots.append(root_val)
-                except (TypeError, ValueError, OverflowError):
-                    # Complex root or conversion error, skip
-                    continue
-            
-            # Also try numerical methods for more roots
-            x_test = np.linspace(x_min, x_max, 1000)
-            y_test = []
-            
-            for xi in x_test:
-                try:
-                    y_val = f.subs(x_sym, xi)
-                    if hasattr(y_val, 'is_real') and y_val.is_real:
-                        y_test.append(float(y_val))
-                    else:
-                        y_test.append(np.nan)
-                except (TypeError, ValueError, OverflowError):
-                    y_test.append(np.nan)
-            
-            # Find sign changes
-            for i in range(len(y_test) - 1):
-                if (self.is_valid_number(y_test[i]) and self.is_valid_number(y_test[i+1]) and 
-                    y_test[i] * y_test[i+1] < 0):
-                    # Root between x_test[i] and x_test[i+1]
-                    root_approx = (x_test[i] + x_test[i+1]) / 2
-                    if not any(abs(root_approx - r) < 0.01 for r in real_roots):
-                        real_roots.append(root_approx)
-            
-            return sorted(list(set([round(r, 4) for r in real_roots])))
+            curve = ParametricCurve(components, t_min, t_max, polar=polar)
         except Exception as e:
-            print(f"Error in find_roots: {e}")
-            return []
+            QMessageBox.critical(self.parent_app, "Error", f"Invalid curve: {e}")
+            return
+        
+        self.cancel_analysis()
+        self.graph_family = None
+        self.analyze_view_button.setEnabled(False)
+        for widget in self.results_frame.findChildren(QWidget):
+            widget.deleteLater()
+        
+        x, y = curve.curve()
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not np.any(finite):
+            self.display_analysis_results(["The curve is undefined over this range"])
+            return
+        symbol = 'θ' if polar else 't'
+        if polar:
+            label = f'r(θ) = {components[0]}'
+        else:
+            label = f'x(t) = {components[0]}, y(t) = {components[1]}'
+        
+        # Whole curve in view, with both axes on the same scale unless it runs off to a pole
+        x_low, x_high = x[finite].min(), x[finite].max()
+        margin = 0.05 * (x_high - x_low) or 1.0
+        canvas = self.graph_canvas
+        canvas.reset(f'Curve: {label}', x_low - margin, x_high + margin,
+                     equal_aspect=not curve.breaks)
+        self.graph_viewport.set_tile_caches([])
+        canvas.set_curve(x, y, label)
+        start = np.flatnonzero(finite)[0]
+        canvas.plot([x[start]], [y[start]], 'go', markersize=8, label=f'Start ({symbol} = {curve.t[start]:g})')
+        canvas.refresh_legend()
+        
+        results = [f"Curve: {label}, {symbol} from {t_min:g} to {t_max:g}",
+                   f"Arc Length: {curve.arc_length():.6g}"]
+        area = curve.area()
+        if polar:
+            results.append(f"Area swept (½∫r² dθ): {area:.6g}")
+        elif area is not None:
+            results.append(f"Enclosed Area: {area:.6g}")
+        else:
+            results.append("Enclosed Area: Curve is not closed over this range")
+        results.append(f"Extent: x from {x_low:.4g} to {x_high:.4g}, "
+                       f"y from {y[finite].min():.4g} to {y[finite].max():.4g}")
+        if curve.breaks:
+            results.append("Breaks at " + ", ".join(f"{symbol} = {b:.4g}" for b in curve.breaks[:10]))
+        self.display_analysis_results(results)
     
-    def find_turning_points(self, f, x_sym, x_min, x_max):
-        """Find turning points (critical points) of the function"""
+    def plot_implicit_curve(self, equation_str, low, high):
+        """Plot the curve F(x, y) = 0 over the square [low, high] x [low, high]"""
         try:
-            # Find derivative
-            f_prime = sp.diff(f, x_sym)
-            
-            # Solve f'(x) = 0
-            critical_points = sp.solve(f_prime, x_sym)
-            turning_points = []
-            
-            for cp in critical_points:
-                try:
-                    if hasattr(cp, 'is_real') and cp.is_real:
-                        x_val = float(cp)
-                        if x_min <= x_val <= x_max:
-                            y_val_expr = f.subs(x_sym, x_val)
-                            if hasattr(y_val_expr, 'is_real') and y_val_expr.is_real:
-                                y_val = float(y_val_expr)
-                                
-                                # Determine if it's a maximum or minimum
-                                f_double_prime = sp.diff(f_prime, x_sym)
-                                second_derivative_expr = f_double_prime.subs(x_sym, x_val)
-                                
-                                if hasattr(second_derivative_expr, 'is_real') and second_derivative_expr.is_real:
-                                    second_derivative = float(second_derivative_expr)
-                                    
-                                    if second_derivative > 0:
-                                        tp_type = "Minimum"
-                                    elif second_derivative < 0:
-                                        tp_type = "Maximum"
-                                    else:
-                                        tp_type = "Saddle Point"
-                                    
-                                    turning_points.append((x_val, y_val, tp_type))
-                except (TypeError, ValueError, OverflowError):
-                    continue
-            
-            return turning_points
+            curve = ImplicitCurve(equation_str, low, high, low, high)
         except Exception as e:
-            print(f"Error in find_turning_points: {e}")
-            return []
-    
-    def find_asymptotes(self, f, x_sym, x_min, x_max):
-        """Find vertical and horizontal asymptotes"""
-        asymptotes = []
-        
-        try:
-            # Check for vertical asymptotes (where denominator = 0)
-            if '/' in str(f):
-                # Try to find where denominator equals zero
-                try:
-                    # This is a simplified approach - extract denominator
-                    f_str = str(f)
-                    if '/' in f_str:
-                        # For rational functions, find where denominator = 0
-                        # This is a basic implementation
-                        pass
-                except:
-                    pass
-            
-            # Check for horizontal asymptotes using limits
-            try:
-                limit_pos = sp.limit(f, x_sym, sp.oo)
-                limit_neg = sp.limit(f, x_sym, -sp.oo)
-                
-                # Check if limits are finite and equal
-                if (limit_pos == limit_neg and 
-                    limit_pos != sp.oo and limit_pos != -sp.oo and
-                    limit_pos != sp.zoo and limit_pos != -sp.zoo):
-                    asymptotes.append({'type': 'horizontal', 'value': float(limit_pos)})
-                elif (limit_pos != sp.oo and limit_pos != -sp.oo and 
-                      limit_pos != sp.zoo and limit_pos != -sp.zoo):
-                    asymptotes.append({'type': 'horizontal', 'value': float(limit_pos)})
-            except:
-                pass
-                
-        except:
-            pass
+            QMessageBox.critical(self.parent_app, "Error", f"Invalid equation: {e}")
+            return
         
-        return asymptotes
+        self.cancel_analysis()
+        self.graph_family = None
+        self.analyze_view_button.setEnabled(False)
+        for widget in self.results_frame.findChildren(QWidget):
+            widget.deleteLater()
+        
+        canvas = self.graph_canvas
+        canvas.reset(f'Curve: {equation_str}', low, high, equal_aspect=True)
+        self.graph_viewport.set_tile_caches([])
+        canvas.set_curve(*curve.curve(), equation_str)
+        # Show the whole square, leaving either axis free to widen for equal scales
+        canvas.ax.set_ylim(low, high)
+        canvas.ax.set_autoscaley_on(True)
+        canvas.refresh_legend()
+        
+        results = [f"Curve: {equation_str}, x and y from {low:g} to {high:g}"]
+        if len(curve.segments):
+            x, y = curve.segments[:, :, 0], curve.segments[:, :, 1]
+            results.append(f"Curve Length in View: {curve.length():.6g}")
+            results.append(f"Extent: x from {x.min():.4g} to {x.max():.4g}, "
+                           f"y from {y.min():.4g} to {y.max():.4g}")
+        else:
+            results.append("No points of the curve found in this range")
+        self.display_analysis_results(results)
     
-    def analyze_domain_range(self, f, x_sym, x_min, x_max):
-        """Analyze domain and range of the function"""
-        results = []
-        
+    def plot_surface(self, function_str, low, high):
+        """Draw z = f(x, y) over the square [low, high] x [low, high] in the selected style"""
         try:
-            # Sample more points to get better range estimate
-            x_sample = np.linspace(x_min, x_max, 100)
-            y_sample = []
-            
-            for xi in x_sample:
-                try:
-                    y_val = f.subs(x_sym, xi)
-                    if hasattr(y_val, 'is_real') and y_val.is_real:
-                        y_sample.append(float(y_val))
-                except (TypeError, ValueError, OverflowError):
-                    continue
-            
-            if y_sample:
-                y_min_sample = min(y_sample)
-                y_max_sample = max(y_sample)
-                
-                results.append(f"Domain: [{x_min}, {x_max}]")
-                results.append(f"Range (approximate): [{y_min_sample:.4f}, {y_max_sample:.4f}]")
-            else:
-                results.append("Domain/Range: Could not determine")
-            
+            grid = self.surface_cache.get(function_str, low, high, low, high)
         except Exception as e:
-            results.append("Domain/Range: Could not determine")
+            QMessageBox.critical(self.parent_app, "Error", f"Invalid function: {e}")
+            return
         
-        return results
+        self.cancel_analysis()
+        self.graph_family = None
+        self.analyze_view_button.setEnabled(False)
+        for widget in self.results_frame.findChildren(QWidget):
+            widget.deleteLater()
+        
+        self.surface_canvas.show_grid(grid, self.surface_style_var.currentText(),
+                                      f'z = {function_str}')
+        
+        results = [f"Surface: z = {function_str}, x and y from {low:g} to {high:g}"]
+        finite = np.isfinite(grid.Z)
+        if np.any(finite):
+            z = grid.Z[finite]
+            results.append(f"z from {z.min():.6g} to {z.max():.6g}")
+            if not np.all(finite):
+                results.append(f"Undefined at {100 * (1 - finite.mean()):.1f}% of the grid")
+        else:
+            results.append("z is undefined everywhere in this range")
+        self.display_analysis_results(results)
+    
+    def update_parameter_sliders(self, symbols):
+        """Show one slider per free parameter, keeping values across re-plots"""
+        names = [symbol.name for symbol in symbols]
+        if names == list(self.parameter_sliders):
+            return
+        for widget in self.sliders_widget.findChildren(QWidget):
+            widget.deleteLater()
+        self.parameter_sliders = {}
+        
+        low, high = self.SLIDER_RANGE
+        for name in names:
+            value = self.slider_values.setdefault(name, 1.0)
+            label = QLabel(f"{name} = {value:g}")
+            label.setMinimumWidth(80)
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setRange(0, self.SLIDER_STEPS)
+            slider.setValue(round((value - low) / (high - low) * self.SLIDER_STEPS))
+            slider.valueChanged.connect(
+                lambda position, n=name: self.on_parameter_slider_moved(n, position))
+            slider.sliderReleased.connect(self.on_parameter_slider_released)
+            self.sliders_layout.addWidget(label)
+            self.sliders_layout.addWidget(slider)
+            self.parameter_sliders[name] = (slider, label)
+        self.sliders_widget.setVisible(bool(names))
+    
+    def on_parameter_slider_moved(self, name, position):
+        """Redraw the curves for the new parameter value, deferring the analysis"""
+        slider, label = self.parameter_sliders[name]
+        low, high = self.SLIDER_RANGE
+        value = round(low + position * (high - low) / self.SLIDER_STEPS, 6)
+        self.slider_values[name] = value
+        label.setText(f"{name} = {value:g}")
+        self.preview_parameters()
+        if not slider.isSliderDown():
+            self.slider_timer.start()
+    
+    def on_parameter_slider_released(self):
+        """Run the full analysis once the user lets go of a slider"""
+        self.slider_timer.stop()
+        self.plot_function()
+    
+    def preview_parameters(self):
+        """Re-evaluate the plotted curves for the current slider values and blit them"""
+        family = self.graph_family
+        if family is None or not family.sliders or self.graph_canvas is None:
+            return
+        # Markers, results and tiles describe the old values until the next analysis
+        self.cancel_analysis()
+        self.graph_viewport.set_tile_caches([])
+        canvas = self.graph_canvas
+        canvas.clear_annotations()
+        x_min, x_max = canvas.ax.get_xlim()
+        x = np.linspace(x_min, x_max, self.resolution_var.value())
+        values = [self.slider_values[symbol.name] for symbol in family.sliders]
+        canvas.update_curves(x, family.live_values(x, values))
+    
+    def analysis_stages(self, family):
+        """Build the (name, callable) stages for the selected analysis options
+
+        Each stage samples the derivative orders it needs for every curve in
+        one stacked evaluation, then returns one result per curve.
+        """
+        analyzer = self.analyzer
+        plot_curve = lambda context: (context.curve(self.plot_point_budget),
+                                      analyzer.find_y_intercept(context))
+        stages = [('plot', lambda: self.map_curves(plot_curve, family.prepare(0)))]
+        if self.show_roots_var.currentText() == "Find Roots":
+            stages.append(('roots', lambda: self.map_curves(analyzer.find_roots, family.prepare(0))))
+        turning_points = self.show_turning_points_var.currentText()
+        if turning_points != "Don't Find Turning Points":
+            exact = turning_points == "Find Exact Turning Points"
+            find_turning_points = lambda context: analyzer.find_turning_points(context, exact)
+            stages.append(('turning_points',
+                           lambda: self.map_curves(find_turning_points, family.prepare(0, 1, 2))))
+        if self.show_asymptotes_var.currentText() == "Find Asymptotes":
+            stages.append(('asymptotes', lambda: self.map_curves(analyzer.find_asymptotes, family.prepare(0))))
+        stages.append(('domain_range',
+                       lambda: self.map_curves(analyzer.analyze_domain_range, family.prepare(0))))
+        stages.append(('behavior',
+                       lambda: self.map_curves(analyzer.analyze_function_behavior, family.prepare(0, 1, 2))))
+        return stages
+    
+    def map_curves(self, func, contexts):
+        """Apply func to every curve's context, concurrently when there are several"""
+        if len(contexts) == 1:
+            return [func(contexts[0])]
+        return self.analysis_pool.map(func, contexts)
+    
+    def start_analysis(self, stages, stage_budget=None):
+        """Run analysis stages on a background worker, streaming results back"""
+        if stage_budget is None:
+            stage_budget = self.analysis_stage_budget
+        worker = AnalysisWorker(stages, stage_budget)
+        worker.progress.connect(
+            lambda percent, stage, w=worker: self.on_analysis_progress(w, percent, stage))
+        worker.stage_finished.connect(
+            lambda stage, result, w=worker: self.on_analysis_stage_finished(w, stage, result))
+        worker.stage_failed.connect(
+            lambda stage, reason, w=worker: self.on_analysis_stage_failed(w, stage, reason))
+        worker.analysis_finished.connect(
+            lambda cancelled, w=worker: self.on_analysis_finished(w, cancelled))
+        # Keep a reference until the thread has fully stopped
+        self.analysis_workers.add(worker)
+        worker.finished.connect(lambda w=worker: self.analysis_workers.discard(w))
+        self.analysis_worker = worker
+        self.cancel_button.setEnabled(True)
+        self.analysis_progress.setValue(0)
+        worker.start()
+    
+    def cancel_analysis(self):
+        """Cancel the running analysis, returning True if one was running"""
+        if self.analysis_worker is None:
+            return False
+        self.analysis_worker.cancel()
+        self.analysis_worker = None
+        return True
+    
+    def on_cancel_analysis_clicked(self):
+        """Handle the Cancel button on the graph screen"""
+        if self.cancel_analysis():
+            self.append_analysis_results(["Analysis cancelled"])
+        self.cancel_button.setEnabled(False)
+        self.analysis_progress.setFormat("Cancelled")
+    
+    def on_analysis_progress(self, worker, percent, stage):
+        """Update the progress bar for the current analysis"""
+        if worker is not self.analysis_worker:
+            return
+        self.analysis_progress.setValue(percent)
+        self.analysis_progress.setFormat(f"{self.ANALYSIS_STAGE_LABELS.get(stage, 'Done')} (%p%)")
+    
+    def on_analysis_stage_finished(self, worker, stage, result):
+        """Draw and list the result of one finished analysis stage for every curve"""
+        if worker is not self.analysis_worker:
+            return
+        family = self.graph_family
+        overlay = len(result) > 1
+        analysis_results = []
+        
+        for index, curve_result in enumerate(result):
+            lines = self.draw_curve_result(stage, index, curve_result, legend=not overlay)
+            if overlay:
+                lines = [f"[{family.labels[index]}] {line}" for line in lines]
+            analysis_results.extend(lines)
+        
+        if stage == 'plot':
+            # Pan/zoom re-samples from cached tiles instead of re-running the analysis
+            self.graph_viewport.set_tile_caches(
+                [TileCache(context.compiled(0)) for context in family.contexts])
+        
+        # Add legend (a full redraw, since new artists were added)
+        self.graph_canvas.refresh_legend()
+        self.append_analysis_results(analysis_results)
+    
+    def draw_curve_result(self, stage, index, result, legend=True):
+        """Record one curve's result for a stage, draw it and return its text lines
+
+        Markers are only labelled in the legend when a single curve is shown;
+        with overlays the legend lists the curves themselves.
+        """
+        canvas = self.graph_canvas
+        analysis = self.graph_results[index]
+        label = lambda text: text if legend else '_nolegend_'
+        
+        if stage == 'plot':
+            # Adaptively sampled curve, already split at each jump or pole
+            (x_plot, y_plot), y_intercept = result
+            canvas.set_curve(x_plot, y_plot, f'f(x) = {self.graph_family.labels[index]}', index)
+            analysis.record('y_intercept', y_intercept)
+            if analysis.y_intercept is not None:
+                canvas.plot([0], [analysis.y_intercept], 'go', markersize=8,
+                            label=label(f'Y-intercept: (0, {analysis.y_intercept:.4f})'))
+            return analysis.describe('y_intercept')
+        
+        analysis.record(stage, result)
+        if stage == 'roots':
+            for root in analysis.roots:
+                if is_valid_number(root):
+                    canvas.plot([root], [0], 'ro', markersize=8, label=label(f'Root: ({root:.4f}, 0)'))
+        
+        elif stage == 'turning_points':
+            for x_val, y_val, tp_type in analysis.turning_points:
+                if is_valid_number(x_val) and is_valid_number(y_val):
+                    color = 'orange' if tp_type == 'Maximum' else 'purple'
+                    canvas.plot([x_val], [y_val], 'o', color=color, markersize=8, 
+                                label=label(f'{tp_type}: ({x_val:.4f}, {y_val:.4f})'))
+        
+        elif stage == 'asymptotes':
+            for asym in analysis.asymptotes:
+                if asym['type'] == 'vertical':
+                    canvas.axvline(x=asym['value'], color='r', linestyle='--', alpha=0.7, 
+                                   label=label(f"Vertical asymptote: x = {asym['value']:.4f}"))
+                elif asym['type'] == 'horizontal':
+                    canvas.axhline(y=asym['value'], color='g', linestyle='--', alpha=0.7,
+                                   label=label(f"Horizontal asymptote: y = {asym['value']:.4f}"))
+        
+        return analysis.describe(stage)
+    
+    def on_analysis_stage_failed(self, worker, stage, reason):
+        """Report a stage that raised or ran out of time"""
+        if worker is not self.analysis_worker:
+            return
+        label = self.ANALYSIS_STAGE_LABELS.get(stage, stage)
+        self.append_analysis_results([f"{label}: Could not complete ({reason})"])
+    
+    def on_analysis_finished(self, worker, cancelled):
+        """Reset the controls once the analysis has stopped"""
+        if worker is not self.analysis_worker:
+            return
+        self.analysis_worker = None
+        self.cancel_button.setEnabled(False)
+    
+    def on_graph_view_changed(self, x_min, x_max):
+        """Offer to re-analyze once the user has panned or zoomed"""
+        self.analyze_view_button.setEnabled(True)
+    
+    def analyze_current_view(self):
+        """Re-run the full analysis over the currently visible x-range"""
+        x_min, x_max = self.graph_canvas.ax.get_xlim()
+        self.x_min_var.setText(f"{x_min:.6g}")
+        self.x_max_var.setText(f"{x_max:.6g}")
+        self.plot_function()
     
     def display_analysis_results(self, results):
         """Display analysis results in a text widget"""
@@ -2187,18 +2694,23 @@ class Calculator:
         results_label.setFont(QFont("Arial", 14, QFont.Bold))
         results_layout.addWidget(results_label)
         
-        results_text = QTextEdit()
-        results_text.setMaximumHeight(150)
-        results_text.setFont(QFont("Arial", 11))
+        self.analysis_results_text = QTextEdit()
+        self.analysis_results_text.setMaximumHeight(150)
+        self.analysis_results_text.setFont(QFont("Arial", 11))
         
-        for result in results:
-            results_text.append(result)
+        self.append_analysis_results(results)
         
-        results_layout.addWidget(results_text)
+        results_layout.addWidget(self.analysis_results_text)
         self.results_layout.addWidget(results_widget)
     
+    def append_analysis_results(self, results):
+        """Append lines to the analysis results text widget"""
+        for result in results:
+            self.analysis_results_text.append(result)
+    
     def show_simulations_menu(self):
         """Show interactive simulations menu"""
+        self.release_visualizer_canvases()
         self.parent_app.clear_layout()
         
         # Title
@@ -2580,6 +3092,39 @@ Wave Speed: {wave_speed:.1f} m/s
         self.function_results.setMaximumHeight(100)
         self.parent_app.main_layout.addWidget(self.function_results)
         
+        # Value table range
+        table_widget = QWidget()
+        table_layout = QHBoxLayout(table_widget)
+        
+        self.table_range_inputs = []
+        for label, default in (("Table from x = ", "-10"), ("to ", "10"), ("step ", "0.5")):
+            table_layout.addWidget(QLabel(label))
+            field = QLineEdit()
+            field.setText(default)
+            field.setMaximumWidth(100)
+            table_layout.addWidget(field)
+            self.table_range_inputs.append(field)
+        
+        table_button = QPushButton("Make Table")
+        table_button.clicked.connect(self.make_value_table)
+        table_layout.addWidget(table_button)
+        
+        self.export_table_button = QPushButton("Export CSV")
+        self.export_table_button.setEnabled(False)
+        self.export_table_button.clicked.connect(self.export_value_table)
+        table_layout.addWidget(self.export_table_button)
+        
+        self.parent_app.main_layout.addWidget(table_widget)
+        
+        # Value table; the view only asks the model for the rows on screen
+        self.value_table_model = ValueTableModel()
+        self.value_table_view = QTableView()
+        self.value_table_view.setModel(self.value_table_model)
+        self.value_table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.value_table_view.verticalHeader().setDefaultSectionSize(22)
+        self.value_table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.parent_app.main_layout.addWidget(self.value_table_view)
+        
         # Back button
         back_button = QPushButton("Back to Simulations")
         back_button.clicked.connect(self.show_simulations_menu)
@@ -2591,21 +3136,10 @@ Wave Speed: {wave_speed:.1f} m/s
             function_str = self.function_input.text()
             x_value = self.x_value_input.value()
             
-            # Create a safe evaluation environment
-            safe_dict = {
-                'x': x_value,
-                'sin': math.sin,
-                'cos': math.cos,
-                'tan': math.tan,
-                'exp': math.exp,
-                'log': math.log,
-                'sqrt': math.sqrt,
-                'pi': math.pi,
-                'e': math.e
-            }
-            
-            # Evaluate the function
-            result = eval(function_str, {"__builtins__": {}}, safe_dict)
+            # Evaluate through the shared expression compiler (trig in radians)
+            result = float(self.expression_compiler.compile(function_str, ('x',))(x_value))
+            if not is_valid_number(result):
+                raise ValueError(f"f(x) is undefined at x = {x_value}")
             
             results = f"""
 Function Evaluation:
@@ -2619,6 +3153,51 @@ f({x_value}) = {result:.6f}
         except Exception as e:
             self.function_results.setText(f"Error: {str(e)}")
     
+    def make_value_table(self):
+        """Tabulate f(x) from start to stop in one vectorised evaluation"""
+        try:
+            function_str = self.function_input.text()
+            try:
+                start, stop, step = [number(field.text()) for field in self.table_range_inputs]
+            except ExpressionError:
+                raise ValueError("start, stop and step must be numbers")
+            x = table_grid(start, stop, step)
+            
+            # Same compiled function as a single evaluation (trig in radians)
+            f = self.expression_compiler.compile(function_str, ('x',))
+            begin = time.perf_counter()
+            y = f(x)
+            elapsed = (time.perf_counter() - begin) * 1000
+            
+            self.value_table_model.set_table(x, y, function_str)
+            self.export_table_button.setEnabled(True)
+            undefined = np.count_nonzero(np.isnan(y))
+            summary = f"Table of f(x) = {function_str}: {len(x):,} rows in {elapsed:.1f} ms"
+            if undefined:
+                summary += f" ({undefined:,} undefined)"
+            self.function_results.setText(summary)
+            
+        except Exception as e:
+            self.function_results.setText(f"Error: {str(e)}")
+    
+    def export_value_table(self):
+        """Write the current value table to a CSV file on a background thread"""
+        path, _ = QFileDialog.getSaveFileName(self.parent_app, "Export Value Table",
+                                              "values.csv", "CSV files (*.csv)")
+        if not path:
+            return
+        x, y = self.value_table_model.columns
+        worker = CsvExportWorker(path, x, y, ("x", "f(x)"))
+        worker.export_finished.connect(
+            lambda path, rows: self.function_results.append(f"Exported {rows:,} rows to {path}"))
+        worker.export_failed.connect(
+            lambda reason: self.function_results.append(f"Export failed: {reason}"))
+        # Keep a reference until the thread has fully stopped
+        self.export_workers.add(worker)
+        worker.finished.connect(lambda w=worker: self.export_workers.discard(w))
+        self.function_results.append(f"Exporting {len(x):,} rows...")
+        worker.start()
+    
     def show_derivative_visualizer(self):
         """Show derivative visualizer"""
         self.parent_app.clear_layout()
@@ -2638,6 +3217,18 @@ f({x_value}) = {result:.6f}
         self.derivative_function_input.setText("x**2")
         function_layout.addWidget(self.derivative_function_input)
         
+        # Plotted x-range
+        function_layout.addWidget(QLabel("x from "))
+        self.derivative_x_min_input = QLineEdit()
+        self.derivative_x_min_input.setText("-5")
+        self.derivative_x_min_input.setMaximumWidth(60)
+        function_layout.addWidget(self.derivative_x_min_input)
+        function_layout.addWidget(QLabel("to "))
+        self.derivative_x_max_input = QLineEdit()
+        self.derivative_x_max_input.setText("5")
+        self.derivative_x_max_input.setMaximumWidth(60)
+        function_layout.addWidget(self.derivative_x_max_input)
+        
         # Calculate derivative button
         calc_button = QPushButton("Calculate Derivative")
         calc_button.clicked.connect(self.calculate_derivative)
@@ -2650,20 +3241,36 @@ f({x_value}) = {result:.6f}
         self.derivative_results.setMaximumHeight(150)
         self.parent_app.main_layout.addWidget(self.derivative_results)
         
+        # Value and slope at the mouse position
+        self.tangent_label = QLabel("Move the mouse over the graph to draw the tangent line")
+        self.parent_app.main_layout.addWidget(self.tangent_label)
+        
+        # Graph of f and f' with a tangent line following the mouse
+        self.derivative_canvas = GraphCanvas(figsize=(10, 6))
+        self.derivative_canvas.mpl_connect('motion_notify_event', self.on_derivative_hover)
+        self.derivative_functions = None
+        self.parent_app.main_layout.addWidget(self.derivative_canvas)
+        
         # Back button
         back_button = QPushButton("Back to Simulations")
         back_button.clicked.connect(self.show_simulations_menu)
         self.parent_app.main_layout.addWidget(back_button)
     
     def calculate_derivative(self):
-        """Calculate derivative of function"""
+        """Calculate derivative of function and plot f and f' together"""
         try:
             function_str = self.derivative_function_input.text()
+            try:
+                x_min = number(self.derivative_x_min_input.text())
+                x_max = number(self.derivative_x_max_input.text())
+            except ValueError:
+                raise ValueError("the x-range must be numbers")
+            if x_min >= x_max:
+                raise ValueError("x minimum must be less than x maximum")
             
-            # Use sympy to calculate derivative
-            x = sp.Symbol('x')
-            f = sp.sympify(function_str)
-            derivative = sp.diff(f, x)
+            # Use the shared expression cache for the sympy derivative
+            expression = self.expression_cache.get(function_str, degrees=False)
+            derivative = expression.derivative(1)
             
             results = f"""
 Derivative Calculation:
@@ -2673,12 +3280,70 @@ f'(x) = {derivative}
             
             self.derivative_results.setText(results)
             
+            # f and f' are compiled once here; hovering only evaluates them at one point
+            f = expression.compiled(0)
+            x = np.linspace(x_min, x_max, 2000)
+            y = f(x)
+            try:
+                f_prime = expression.compiled(1)
+                y_prime = f_prime(x)
+                if not np.any(np.isfinite(y_prime)):
+                    raise ValueError("f'(x) has no numeric value in this range")
+            except Exception as e:
+                # The symbolic f' above still stands; only its curve and the tangent are skipped
+                f_prime = None
+                self.derivative_results.append(f"f'(x) cannot be plotted: {e}")
+            
+            canvas = self.derivative_canvas
+            canvas.reset(f"f(x) = {function_str} and f'(x)", x_min, x_max, curves=4)
+            canvas.set_curve(x, y, f'f(x) = {function_str}', 0)
+            if f_prime is not None:
+                canvas.set_curve(x, y_prime, f"f'(x) = {derivative}", 1)
+            # Lines 2 and 3 are the tangent line and its point of contact
+            tangent, point = canvas.lines[2], canvas.lines[3]
+            tangent.set_color('k')
+            tangent.set_linestyle('--')
+            tangent.set_linewidth(1.5)
+            point.set_color('r')
+            point.set_linestyle('None')
+            point.set_marker('o')
+            # f and f' stay put while hovering, so only the tangent is blitted
+            canvas.freeze_curve(0)
+            canvas.freeze_curve(1)
+            canvas.refresh_legend()
+            self.derivative_functions = (f, f_prime)
+            
         except Exception as e:
+            self.derivative_functions = None
             self.derivative_results.setText(f"Error: {str(e)}")
     
+    def on_derivative_hover(self, event):
+        """Draw the tangent to f at the mouse's x position"""
+        canvas = self.derivative_canvas
+        if self.derivative_functions is None or event.inaxes is not canvas.ax or event.xdata is None:
+            return
+        f, f_prime = self.derivative_functions
+        x0 = event.xdata
+        y0 = float(f(x0))
+        slope = float(f_prime(x0)) if f_prime is not None else float('nan')
+        if not (is_valid_number(y0) and is_valid_number(slope)):
+            canvas.update_lines({2: ([], []), 3: ([], [])})
+            if f_prime is None and is_valid_number(y0):
+                self.tangent_label.setText(f"x = {x0:.4f}   f(x) = {y0:.4f}   (no numeric f'(x) for a tangent)")
+            else:
+                self.tangent_label.setText(f"f is not differentiable at x = {x0:.4f}")
+            return
+        x_min, x_max = canvas.ax.get_xlim()
+        canvas.update_lines({2: ([x_min, x_max], [y0 + slope * (x_min - x0), y0 + slope * (x_max - x0)]),
+                             3: ([x0], [y0])})
+        self.tangent_label.setText(f"x = {x0:.4f}   f(x) = {y0:.4f}   slope f'(x) = {slope:.4f}   "
+                                   f"tangent: y = {slope:.4f}(x - {x0:.4f}) + {y0:.4f}")
+    
     def show_integral_visualizer(self):
         """Show integral visualizer"""
         self.parent_app.clear_layout()
+        # Warm up the solver processes for the exact antiderivative and value
+        self.solver_service.start()
         
         # Title
         title_label = QLabel("Integral Visualizer")
@@ -2695,6 +3360,19 @@ f'(x) = {derivative}
         self.integral_function_input.setText("x**2")
         function_layout.addWidget(self.integral_function_input)
         
+        # Limits of integration (numbers or expressions such as pi/2)
+        function_layout.addWidget(QLabel("from a = "))
+        self.integral_lower_input = QLineEdit()
+        self.integral_lower_input.setText("0")
+        self.integral_lower_input.setMaximumWidth(80)
+        function_layout.addWidget(self.integral_lower_input)
+        
+        function_layout.addWidget(QLabel("to b = "))
+        self.integral_upper_input = QLineEdit()
+        self.integral_upper_input.setText("1")
+        self.integral_upper_input.setMaximumWidth(80)
+        function_layout.addWidget(self.integral_upper_input)
+        
         # Calculate integral button
         calc_button = QPushButton("Calculate Integral")
         calc_button.clicked.connect(self.calculate_integral)
@@ -2707,31 +3385,114 @@ f'(x) = {derivative}
         self.integral_results.setMaximumHeight(150)
         self.parent_app.main_layout.addWidget(self.integral_results)
         
+        # Graph of f with the integrated area shaded
+        self.integral_canvas = GraphCanvas(figsize=(10, 6))
+        self.parent_app.main_layout.addWidget(self.integral_canvas)
+        
         # Back button
         back_button = QPushButton("Back to Simulations")
         back_button.clicked.connect(self.show_simulations_menu)
         self.parent_app.main_layout.addWidget(back_button)
     
+    def release_visualizer_canvases(self):
+        """Stop any symbolic integration and free the derivative and integral screens' figures"""
+        if self.integral_worker is not None:
+            self.integral_worker.cancel()
+            self.integral_worker = None
+        for canvas in (self.integral_canvas, self.derivative_canvas):
+            if canvas is not None:
+                canvas.release()
+        self.integral_canvas = None
+        self.derivative_canvas = None
+    
     def calculate_integral(self):
-        """Calculate integral of function"""
+        """Calculate the definite integral numerically, shade it, then look for exact forms
+        
+        The adaptive Gauss-Kronrod value is shown at once; the antiderivative and
+        exact value from SymPy follow from a background worker if the solver
+        finds them within its time limit.
+        """
         try:
             function_str = self.integral_function_input.text()
+            try:
+                # Kept symbolic for the exact pass, so a limit such as pi/2 stays exact
+                bounds = [parse_function(field.text(), degrees=False)
+                          for field in (self.integral_lower_input, self.integral_upper_input)]
+                a, b = [float(bound) for bound in bounds]
+            except (TypeError, ValueError, sp.SympifyError):
+                raise ValueError("the limits a and b must be numbers")
+            if not (is_valid_number(a) and is_valid_number(b)):
+                raise ValueError("the limits a and b must be finite")
             
-            # Use sympy to calculate integral
-            x = sp.Symbol('x')
-            f = sp.sympify(function_str)
-            integral = sp.integrate(f, x)
+            # Use the shared expression cache for the compiled function (radians)
+            expression = self.expression_cache.get(function_str, degrees=False)
+            f = expression.compiled()
+            start = time.perf_counter()
+            value, error = gauss_kronrod(f, a, b)
+            elapsed = (time.perf_counter() - start) * 1000
             
-            results = f"""
+            if not is_valid_number(value):
+                numeric = f"cannot be found: f(x) is undefined somewhere between {a:g} and {b:g}"
+            elif error > 1e-6 * max(1.0, abs(value)):
+                numeric = f"≈ {value:.10g} (did not converge; the integral may diverge)"
+            else:
+                numeric = f"= {value:.12g} (error ≤ {error:.1e}, {elapsed:.1f} ms)"
+            self.integral_results.setText(f"""
 Integral Calculation:
 f(x) = {function_str}
-∫f(x)dx = {integral} + C
-            """
+∫ from {a:g} to {b:g} f(x)dx {numeric}""")
+            self.plot_integral(function_str, f, a, b)
             
-            self.integral_results.setText(results)
+            # Exact forms are looked up in the background, within the solver's time limit
+            if self.integral_worker is not None:
+                self.integral_worker.cancel()
+            stages = [('antiderivative', lambda: expression.integral(self.solver_service)),
+                      ('exact_value', lambda: expression.definite_integral(*bounds, solver=self.solver_service))]
+            worker = AnalysisWorker(stages, self.solver_service.timeout + 1.0)
+            worker.stage_finished.connect(
+                lambda stage, result, w=worker: self.on_integral_stage_finished(w, stage, result))
+            worker.stage_failed.connect(
+                lambda stage, reason, w=worker: self.on_integral_stage_failed(w, stage, reason))
+            self.analysis_workers.add(worker)
+            worker.finished.connect(lambda w=worker: self.analysis_workers.discard(w))
+            self.integral_worker = worker
+            worker.start()
             
         except Exception as e:
             self.integral_results.setText(f"Error: {str(e)}")
+    
+    def plot_integral(self, function_str, f, a, b):
+        """Plot f around [a, b] and shade the signed area between it and the x-axis"""
+        canvas = self.integral_canvas
+        low, high = min(a, b), max(a, b)
+        margin = 0.25 * (high - low) or 1.0
+        canvas.reset(f'∫ f(x)dx from {a:g} to {b:g}', low - margin, high + margin)
+        x = np.linspace(low - margin, high + margin, 2000)
+        canvas.set_curve(x, f(x), f'f(x) = {function_str}')
+        x_area = np.linspace(low, high, 1000)
+        y_area = f(x_area)
+        canvas.fill_between(x_area, y_area, 0, where=y_area >= 0, color='g', alpha=0.3,
+                            interpolate=True, label='Positive area')
+        canvas.fill_between(x_area, y_area, 0, where=y_area < 0, color='r', alpha=0.3,
+                            interpolate=True, label='Negative area')
+        canvas.refresh_legend()
+    
+    def on_integral_stage_finished(self, worker, stage, result):
+        """Append the antiderivative or exact value once SymPy has found it"""
+        if worker is not self.integral_worker or result.has(sp.Integral):
+            # Stale, or SymPy could only restate the integral unevaluated
+            return
+        if stage == 'antiderivative':
+            self.integral_results.append(f"∫f(x)dx = {result} + C")
+        elif result.is_number and result.is_extended_real and not result.is_Float:
+            self.integral_results.append(f"Exact value: {result}")
+    
+    def on_integral_stage_failed(self, worker, stage, reason):
+        """Say why the antiderivative or exact value could not be found"""
+        if worker is not self.integral_worker:
+            return
+        name = "antiderivative" if stage == 'antiderivative' else "exact value"
+        self.integral_results.append(f"No {name} found: {reason}")
 
     def open_topic_calculator_with_formula(self, topic, formula):
         """Open topic calculator with specific topic and formula pre-selected"""
@@ -2772,98 +3533,4 @@ f(x) = {function_str}
                 for i in range(self.formula_var.count()):
                     if formula.lower() in self.formula_var.itemText(i).lower():
                         self.formula_var.setCurrentIndex(i)
-                        break
-    
-    def analyze_function_behavior(self, f, x_sym, x_min, x_max):
-        """Analyze additional function behavior"""
-        results = []
-        
-        try:
-            # Check for symmetry
-            f_neg_x = f.subs(x_sym, -x_sym)
-            
-            if f == f_neg_x:
-                results.append("Symmetry: Even function (symmetric about y-axis)")
-            elif f == -f_neg_x:
-                results.append("Symmetry: Odd function (symmetric about origin)")
-            else:
-                results.append("Symmetry: Neither even nor odd")
-            
-            # Check for periodicity (basic check for trigonometric functions)
-            trig_functions = ['sin', 'cos', 'tan', 'csc', 'sec', 'cot']
-            f_str = str(f).lower()
-            
-            is_periodic = any(trig in f_str for trig in trig_functions)
-            if is_periodic:
-                results.append("Periodicity: Function appears to be periodic")
-            else:
-                results.append("Periodicity: Function appears to be non-periodic")
-            
-            # Check for monotonicity in different intervals
-            f_prime = sp.diff(f, x_sym)
-            
-            # Sample points to check if derivative is always positive/negative
-            x_sample = np.linspace(x_min, x_max, 50)
-            derivative_signs = []
-            
-            for xi in x_sample:
-                try:
-                    deriv_val = f_prime.subs(x_sym, xi)
-                    if hasattr(deriv_val, 'is_real') and deriv_val.is_real:
-                        deriv_float = float(deriv_val)
-                        if deriv_float > 0:
-                            derivative_signs.append(1)
-                        elif deriv_float < 0:
-                            derivative_signs.append(-1)
-                        else:
-                            derivative_signs.append(0)
-                    else:
-                        derivative_signs.append(0)
-                except (TypeError, ValueError, OverflowError):
-                    derivative_signs.append(0)
-            
-            if all(sign >= 0 for sign in derivative_signs):
-                results.append("Monotonicity: Function is increasing in the given range")
-            elif all(sign <= 0 for sign in derivative_signs):
-                results.append("Monotonicity: Function is decreasing in the given range")
-            else:
-                results.append("Monotonicity: Function is neither strictly increasing nor decreasing")
-            
-            # Check for boundedness
-            y_sample = []
-            for xi in x_sample:
-                try:
-                    y_val = f.subs(x_sym, xi)
-                    if hasattr(y_val, 'is_real') and y_val.is_real:
-                        y_sample.append(float(y_val))
-                except (TypeError, ValueError, OverflowError):
-                    continue
-            
-            if y_sample:
-                y_min_sample = min(y_sample)
-                y_max_sample = max(y_sample)
-                
-                if abs(y_min_sample) < 1e6 and abs(y_max_sample) < 1e6:
-                    results.append("Boundedness: Function appears to be bounded in the given range")
-                else:
-                    results.append("Boundedness: Function appears to be unbounded in the given range")
-            else:
-                results.append("Boundedness: Could not determine")
-                
-        except Exception as e:
-            results.append("Behavior Analysis: Could not determine function behavior")
-        
-        return results
-
-    def is_valid_number(self, value):
-        """Check if a value is a valid finite number"""
-        try:
-            if isinstance(value, (int, float)):
-                return not (math.isnan(value) or math.isinf(value))
-            elif hasattr(value, 'is_real') and value.is_real:
-                float_val = float(value)
-                return not (math.isnan(float_val) or math.isinf(float_val))
-            else:
-                return False
-        except (TypeError, ValueError, OverflowError):
-            return False
\ No newline at end of file
+                        break
\ No newline at end of file
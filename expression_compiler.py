@@ -0,0 +1,501 @@
+"""Safe, cached compilation of user-typed expressions.
+
+Expressions are parsed once into a Python AST and checked against an
+allow-list: numbers, the arithmetic operators, a fixed set of maths
+functions and constants, and the caller's variables. Nothing else (no
+attribute access, subscripts, keyword arguments or other names) gets
+through, so a typed string can never reach arbitrary Python. A validated
+expression is compiled to bytecode over NumPy functions and cached, and
+evaluates plain numbers and whole arrays alike.
+
+Besides floating point, an expression can be compiled for exact rational
+arithmetic (SymPy numbers, so 0.1 + 0.2 is 3/10) or for a chosen number of
+significant digits (an mpmath context of that precision).
+
+The same check guards the SymPy parser used by the graph screen: see
+validate().
+"""
+import ast
+import decimal
+import math
+import threading
+from collections import OrderedDict
+
+import mpmath
+import numpy as np
+import sympy as sp
+from scipy import special
+
+# Longest expression accepted, in characters
+MAX_LENGTH = 2000
+
+# Precision of exact rational arithmetic; any other precision is a number of significant digits
+EXACT = 'exact'
+
+# Largest exact result allowed, in decimal digits: bigger powers and factorials are
+# refused before they are computed
+MAX_EXACT_DIGITS = 1_000_000
+
+# Exact results with more digits than this are shown rounded until full_text is asked for
+LONG_RESULT_DIGITS = 1000
+
+
+class ExpressionError(ValueError):
+    """Raised for an expression that is malformed or uses something not allowed"""
+
+
+def _log(value, base=None):
+    """Natural logarithm, or the logarithm to a base as in log(x, 2)"""
+    return np.log(value) if base is None else np.log(value) / np.log(base)
+
+
+# Functions that may be called, by name: (numeric implementation, number of arguments).
+# Every name is also understood by SymPy, so the same strings work on the graph screen.
+FUNCTIONS = {
+    'sin': (np.sin, (1,)), 'cos': (np.cos, (1,)), 'tan': (np.tan, (1,)),
+    'cot': (lambda v: 1 / np.tan(v), (1,)), 'sec': (lambda v: 1 / np.cos(v), (1,)),
+    'csc': (lambda v: 1 / np.sin(v), (1,)),
+    'asin': (np.arcsin, (1,)), 'acos': (np.arccos, (1,)), 'atan': (np.arctan, (1,)),
+    'sinh': (np.sinh, (1,)), 'cosh': (np.cosh, (1,)), 'tanh': (np.tanh, (1,)),
+    'asinh': (np.arcsinh, (1,)), 'acosh': (np.arccosh, (1,)), 'atanh': (np.arctanh, (1,)),
+    'exp': (np.exp, (1,)), 'log': (_log, (1, 2)), 'ln': (np.log, (1,)),
+    'sqrt': (np.sqrt, (1,)), 'cbrt': (np.cbrt, (1,)),
+    'abs': (np.abs, (1,)), 'Abs': (np.abs, (1,)), 'sign': (np.sign, (1,)),
+    'floor': (np.floor, (1,)), 'ceiling': (np.ceil, (1,)),
+    'factorial': (lambda v: special.gamma(np.add(v, 1)), (1,)),
+    'gamma': (special.gamma, (1,)), 'erf': (special.erf, (1,)),
+    'Max': (np.maximum, (2,)), 'Min': (np.minimum, (2,)),
+    'Heaviside': (lambda v: np.heaviside(v, 0.5), (1,)),
+}
+
+# Trig functions whose argument is converted from degrees in degree mode
+DEGREE_FUNCTIONS = ('sin', 'cos', 'tan', 'cot', 'sec', 'csc')
+
+# Named constants
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'E': np.e}
+
+# SymPy counterparts of FUNCTIONS for exact arithmetic (factorial is checked by _exact_factorial)
+EXACT_FUNCTIONS = {
+    'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan, 'cot': sp.cot, 'sec': sp.sec, 'csc': sp.csc,
+    'asin': sp.asin, 'acos': sp.acos, 'atan': sp.atan,
+    'sinh': sp.sinh, 'cosh': sp.cosh, 'tanh': sp.tanh,
+    'asinh': sp.asinh, 'acosh': sp.acosh, 'atanh': sp.atanh,
+    'exp': sp.exp, 'log': sp.log, 'ln': sp.log, 'sqrt': sp.sqrt, 'cbrt': sp.cbrt,
+    'abs': sp.Abs, 'Abs': sp.Abs, 'sign': sp.sign, 'floor': sp.floor, 'ceiling': sp.ceiling,
+    'gamma': sp.gamma, 'erf': sp.erf, 'Max': sp.Max, 'Min': sp.Min,
+    'Heaviside': lambda v: sp.Heaviside(v, sp.S.Half),
+}
+
+# Names the SymPy parser gives a meaning of its own; they may not be used as symbols
+RESERVED_NAMES = {'oo', 'zoo', 'nan', 'I', 'S', 'N', 'O', 'Q'}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv, ast.UAdd, ast.USub,
+)
+
+
+def normalize(text):
+    """Canonical form of a typed expression: calculator symbols become Python operators"""
+    return (text.strip().replace('×', '*').replace('÷', '/').replace('−', '-')
+            .replace('^', '**'))
+
+
+def parse(text, variables=None):
+    """Parse text into a validated AST, raising ExpressionError if it is not allowed
+
+    variables lists the names that may appear as values; with None any
+    plain identifier may (the graph screen's free parameters).
+    """
+    text = normalize(text)
+    if not text:
+        raise ExpressionError("The expression is empty")
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"The expression is longer than {MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError:
+        raise ExpressionError(f"Could not read the expression '{text}'")
+
+    calls = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"'{ast.unparse(node)}' is not allowed in an expression")
+        if isinstance(node, ast.Constant) and (
+                isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+            raise ExpressionError(f"{node.value!r} is not a number")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ExpressionError(f"'{ast.unparse(node.func)}' is not a known function")
+            arity = FUNCTIONS[node.func.id][1]
+            if node.keywords or len(node.args) not in arity:
+                raise ExpressionError(f"{node.func.id} takes {' or '.join(map(str, arity))} argument(s)")
+        if isinstance(node, ast.Name) and id(node) not in calls:
+            name = node.id
+            if name in FUNCTIONS:
+                raise ExpressionError(f"{name} is a function; write {name}(...)")
+            allowed = (name in CONSTANTS
+                       or (name in variables if variables is not None
+                           else not name.startswith('_') and name not in RESERVED_NAMES))
+            if not allowed:
+                raise ExpressionError(f"Unknown name '{name}'")
+    return tree
+
+
+def digit_count(n):
+    """Number of decimal digits of the integer n, possibly one too many"""
+    return int(abs(int(n)).bit_length() * math.log10(2)) + 1
+
+
+def _exact_pow(base, exponent):
+    """base ** exponent in exact arithmetic, refusing results of more than MAX_EXACT_DIGITS"""
+    if base.is_Rational and exponent.is_Rational and abs(base) != 1 and base != 0:
+        digits = abs(float(exponent)) * max(digit_count(base.p), digit_count(base.q))
+        if digits > MAX_EXACT_DIGITS:
+            raise ExpressionError(f"The exact result would have more than {MAX_EXACT_DIGITS:,} digits")
+    return base ** exponent
+
+
+def _exact_factorial(n):
+    """n! in exact arithmetic, refusing results of more than MAX_EXACT_DIGITS"""
+    if n.is_Integer and n > 1 and math.lgamma(float(n) + 1) / math.log(10) > MAX_EXACT_DIGITS:
+        raise ExpressionError(f"The exact result would have more than {MAX_EXACT_DIGITS:,} digits")
+    return sp.factorial(n)
+
+
+def _precise_functions(context):
+    """FUNCTIONS for the mpmath context of one precision"""
+    return {
+        'sin': context.sin, 'cos': context.cos, 'tan': context.tan, 'cot': context.cot,
+        'sec': context.sec, 'csc': context.csc,
+        'asin': context.asin, 'acos': context.acos, 'atan': context.atan,
+        'sinh': context.sinh, 'cosh': context.cosh, 'tanh': context.tanh,
+        'asinh': context.asinh, 'acosh': context.acosh, 'atanh': context.atanh,
+        'exp': context.exp, 'log': context.log, 'ln': context.ln,
+        'sqrt': context.sqrt, 'cbrt': context.cbrt,
+        'abs': context.fabs, 'Abs': context.fabs, 'sign': context.sign,
+        'floor': context.floor, 'ceiling': context.ceil,
+        'factorial': context.factorial, 'gamma': context.gamma, 'erf': context.erf,
+        'Max': lambda a, b: a if a >= b else b, 'Min': lambda a, b: a if a <= b else b,
+        'Heaviside': lambda v: context.mpf(1 if v > 0 else 0 if v < 0 else 0.5),
+    }
+
+
+def validate(text):
+    """Check a string is a safe expression before handing it to SymPy; returns it normalized"""
+    parse(text)
+    return normalize(text)
+
+
+class _NumericConstants(ast.NodeTransformer):
+    """Replace every literal with a number of the precision mode, looked up by name
+
+    In floating point, integer literals would otherwise make ``9**9**9``
+    build a huge integer; as NumPy floats it overflows to inf at once, and
+    1/0 gives inf rather than raising, the same as for arrays. Exact
+    literals are SymPy rationals, so 0.1 is exactly 1/10, and their powers
+    go through _exact_pow.
+    """
+
+    def __init__(self, number, exact=False):
+        self.number = number
+        self.exact = exact
+        self.constants = {}
+
+    def visit_Constant(self, node):
+        name = f'_c{len(self.constants)}'
+        self.constants[name] = self.number(node.value)
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if self.exact and isinstance(node.op, ast.Pow):
+            call = ast.Call(func=ast.Name(id='_pow', ctx=ast.Load()),
+                            args=[node.left, node.right], keywords=[])
+            return ast.copy_location(call, node)
+        return node
+
+
+def _float_literal(value):
+    """Literal as a NumPy float; integers too large for a float become inf"""
+    try:
+        return np.float64(value)
+    except OverflowError:
+        return np.float64(np.inf)
+
+
+def _exact_literal(value):
+    """Literal as an exact SymPy number; 0.1 is read from its digits as 1/10"""
+    return sp.Integer(value) if isinstance(value, int) else sp.Rational(repr(value))
+
+
+class CompiledFormula:
+    """A validated expression compiled to bytecode over NumPy functions
+
+    Call it with one value or array per variable, in order; arrays are
+    evaluated element-wise in one pass. Undefined results come back as NaN
+    and overflow as inf; nothing raises for bad input values.
+
+    With precision=EXACT the expression is instead evaluated in exact SymPy
+    arithmetic, and with a whole number of significant digits in an mpmath
+    context of that precision; both take scalar values and return the
+    SymPy or mpmath number (NaN when undefined).
+    """
+
+    def __init__(self, text, variables=(), degrees=False, precision=None):
+        self.text = normalize(text)
+        self.variables = tuple(variables)
+        self.degrees = degrees
+        self.precision = precision
+        tree = parse(self.text, self.variables)
+
+        if precision is None:
+            functions = {name: func for name, (func, _) in FUNCTIONS.items()}
+            constants = {name: np.float64(value) for name, value in CONSTANTS.items()}
+            transformer = _NumericConstants(_float_literal)
+            radians = np.radians
+        elif precision == EXACT:
+            functions = dict(EXACT_FUNCTIONS, factorial=_exact_factorial, _pow=_exact_pow)
+            constants = {'pi': sp.pi, 'e': sp.E, 'E': sp.E}
+            transformer = _NumericConstants(_exact_literal, exact=True)
+            radians = lambda value: value * sp.pi / 180
+        else:
+            # A context of its own, so each precision level is independent and thread-safe
+            self.context = mpmath.MPContext()
+            self.context.dps = int(precision)
+            functions = _precise_functions(self.context)
+            constants = {'pi': self.context.pi, 'e': self.context.e, 'E': self.context.e}
+            transformer = _NumericConstants(lambda value: self.context.mpf(repr(value)))
+            radians = self.context.radians
+
+        tree = ast.fix_missing_locations(transformer.visit(tree))
+        self._code = compile(tree, '<expression>', 'eval')
+        self._namespace = {'__builtins__': {}}
+        for name, func in functions.items():
+            if degrees and name in DEGREE_FUNCTIONS:
+                func = (lambda f: lambda value: f(radians(value)))(func)
+            self._namespace[name] = func
+        self._namespace.update(constants)
+        self._namespace.update(transformer.constants)
+
+    def __call__(self, *values):
+        """Evaluate at the given variable values (numbers or arrays)"""
+        if len(values) != len(self.variables):
+            raise TypeError(f"expected values for {', '.join(self.variables) or 'no variables'}")
+        if self.precision is not None:
+            return self._evaluate_precise(values)
+        namespace = dict(self._namespace)
+        namespace.update(zip(self.variables, (np.asarray(value, dtype=float) for value in values)))
+        with np.errstate(all='ignore'):
+            result = eval(self._code, namespace)
+        result = np.asarray(result, dtype=float)
+        if values:
+            result = np.broadcast_to(result, np.broadcast(*values).shape)
+        return result[()] if result.ndim == 0 else np.array(result)
+
+    def _evaluate_precise(self, values):
+        """Evaluate in exact or mpmath arithmetic"""
+        exact = self.precision == EXACT
+        namespace = dict(self._namespace)
+        namespace.update(zip(self.variables, (
+            sp.nsimplify(value) if exact else self.context.mpf(value) for value in values)))
+        try:
+            return eval(self._code, namespace)
+        except ExpressionError:
+            raise
+        except (ZeroDivisionError, ValueError):
+            # Division or remainder by zero, or a pole such as factorial(-1)
+            return sp.nan if exact else self.context.nan
+
+
+class ExpressionCompiler:
+    """Bounded LRU cache of CompiledFormula objects
+
+    Keyed by the normalized text, the variables, the degree mode and the
+    precision, so repeated evaluation of the same expression at the same
+    precision never parses it again.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, text, variables=(), degrees=False, precision=None):
+        """Return the cached CompiledFormula, compiling it on a miss"""
+        key = (normalize(text), tuple(variables), degrees, precision)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            self.misses += 1
+        # An ExpressionError propagates to the caller and nothing is cached
+        entry = CompiledFormula(*key)
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def evaluate(self, text, degrees=False, precision=None):
+        """Value of an expression without variables
+
+        A float in floating point, otherwise the SymPy or mpmath number.
+        """
+        value = self.compile(text, (), degrees, precision)()
+        return float(value) if precision is None else value
+
+
+def number(text):
+    """Value of a constant expression such as '2*pi', raising ExpressionError unless finite"""
+    value = float(CompiledFormula(text)())
+    if not np.isfinite(value):
+        raise ExpressionError(f"'{text.strip()}' is not a finite number")
+    return value
+
+
+def _real_value(value):
+    """value as a finite real number, raising ValueError for anything else"""
+    if isinstance(value, sp.Basic):
+        if value.has(sp.nan, sp.zoo):
+            raise ValueError("the result is undefined")
+        if value.has(sp.oo, -sp.oo):
+            raise ValueError("the result is too large to show")
+        if value.is_extended_real is False or (
+                value.is_extended_real is None and sp.im(value.evalf(30)) != 0):
+            raise ValueError("the result is not a real number")
+        return value
+    context = getattr(value, 'context', None)
+    if context is not None:
+        # An mpmath number, real or complex
+        if context.im(value) != 0:
+            raise ValueError("the result is not a real number")
+        value = context.re(value)
+        if context.isnan(value):
+            raise ValueError("the result is undefined")
+        if context.isinf(value):
+            raise ValueError("the result is too large to show")
+        return value
+    value = float(value)
+    if math.isnan(value):
+        raise ValueError("the result is undefined")
+    if math.isinf(value):
+        raise ValueError("the result is too large to show")
+    return value
+
+
+def is_long(value):
+    """True for an exact rational result too long to show in full straight away"""
+    return (isinstance(value, sp.Rational)
+            and max(digit_count(value.p), digit_count(value.q)) > LONG_RESULT_DIGITS)
+
+
+def result_text(value, digits=15):
+    """Display text for a result of any precision; raises ValueError unless it is finite and real
+
+    Floats are shown to 15 significant figures and mpmath numbers to their
+    context's precision. Exact results are shown exactly, except that any
+    with more than LONG_RESULT_DIGITS digits are rounded to `digits`
+    figures so they never hold up the display; full_text gives every digit.
+    """
+    value = _real_value(value)
+    if isinstance(value, float):
+        # Whole numbers without a trailing .0, everything else to 15 significant figures
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else f"{value:.15g}"
+    context = getattr(value, 'context', None)
+    if context is not None:
+        if context.isint(value) and abs(value) < context.mpf(10) ** context.dps:
+            return str(int(value))
+        return context.nstr(value, context.dps)
+    if any(digit_count(atom.p) > LONG_RESULT_DIGITS or digit_count(atom.q) > LONG_RESULT_DIGITS
+           for atom in value.atoms(sp.Rational)):
+        return approximate_text(value, digits)
+    return str(value)
+
+
+def approximate_text(value, digits=15):
+    """value to `digits` significant figures, cheaply even for huge exact numbers"""
+    value = _real_value(value)
+    if isinstance(value, sp.Rational):
+        return mpmath.nstr(_leading_ratio(value.p, value.q, digits), digits)
+    if isinstance(value, sp.Basic):
+        return str(value.evalf(digits))
+    return value.context.nstr(value, digits) if hasattr(value, 'context') else f"{value:.{digits}g}"
+
+
+def _leading_ratio(p, q, digits):
+    """p/q as an mpmath number accurate to `digits` figures, from their leading bits only
+
+    Converting a whole huge integer to mpmath takes seconds (2**999999 about
+    three), so p and q are cut down to a few more bits than the figures need
+    and the shifted-out powers of two are put back into the exponent.
+    """
+    bits = int(digits * math.log2(10)) + 64
+    p_shift = max(abs(p).bit_length() - bits, 0)
+    q_shift = max(q.bit_length() - bits, 0)
+    with mpmath.workprec(bits):
+        ratio = mpmath.mpf(p >> p_shift if p >= 0 else -(-p >> p_shift)) / (q >> q_shift)
+        return mpmath.ldexp(ratio, p_shift - q_shift)
+
+
+class ResultSummary:
+    """Everything the display needs from a result, worked out off the GUI thread
+
+    text is the display text, or None with error set if the result cannot
+    be shown. approximation is the decimal value added after short exact
+    answers such as 3/10 or sqrt(2). long_value holds a result too long to
+    show in full and digits its approximate length, for full_text later.
+    """
+
+    def __init__(self, value):
+        self.text = self.approximation = self.error = self.long_value = None
+        self.digits = 0
+        try:
+            self.text = result_text(value)
+        except ValueError as e:
+            self.error = str(e)
+            return
+        if is_long(value):
+            self.long_value = value
+            self.digits = max(digit_count(value.p), digit_count(value.q))
+        elif isinstance(value, sp.Basic) and not value.is_Integer:
+            self.approximation = approximate_text(value)
+
+
+def _integer_text(n):
+    """Decimal digits of a non-negative integer of any length
+
+    Python refuses to convert integers of more than a few thousand digits
+    and its conversion is quadratic, so long ones are split in halves and
+    joined with decimal arithmetic, which is much faster.
+    """
+    context = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+    powers = {}
+
+    def convert(n, bits):
+        if bits <= 4096:
+            return decimal.Decimal(n)
+        low_bits = bits // 2
+        if low_bits not in powers:
+            powers[low_bits] = context.power(decimal.Decimal(2), low_bits)
+        high = convert(n >> low_bits, bits - low_bits)
+        return context.add(context.multiply(high, powers[low_bits]),
+                           convert(n & ((1 << low_bits) - 1), low_bits))
+
+    return str(convert(n, n.bit_length()))
+
+
+def full_text(value):
+    """Every digit of an exact rational result, as 'p' or 'p/q'
+
+    Takes around a second for a million digits, so long results should be
+    converted off the GUI thread.
+    """
+    sign = '-' if value < 0 else ''
+    text = sign + _integer_text(abs(value.p))
+    return text if value.q == 1 else f"{text}/{_integer_text(value.q)}"
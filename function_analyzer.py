@@ -0,0 +1,432 @@
+"""Headless analysis of a function of x over a range.
+
+Everything here is plain Python on top of SymPy/NumPy with no Qt import, so
+the same analysis runs behind the graph screen, in worker processes, in
+batch jobs and in benchmarks. FunctionAnalyzer computes the individual
+stages from an AnalysisContext; AnalysisResult collects them for one
+function and turns them into the text shown to the user.
+"""
+import math
+
+import numpy as np
+import sympy as sp
+
+from function_engine import ExpressionCache, AnalysisContext, denominator_zeros
+from numeric_methods import (isolate_roots, merge_close, symmetry, estimate_period,
+                             find_turning_points, classify_critical_points)
+from solver_service import SolverTimeout, SolverError
+
+# Analysis stages in the order they are run and reported
+STAGES = ('y_intercept', 'roots', 'turning_points', 'asymptotes', 'domain_range', 'behavior')
+
+# Largest expression (by sp.count_ops) whose numeric symmetry/period is confirmed symbolically
+SYMBOLIC_CHECK_OPS = 40
+
+# Seconds allowed for the symbolic period check in the solver service
+SYMBOLIC_CHECK_TIMEOUT = 0.5
+
+# Samples of f on [1e6, 1e7] that must agree for a numeric limit at infinity
+LIMIT_TAIL_SAMPLES = 64
+
+# Display label for each stage
+STAGE_LABELS = {
+    'y_intercept': "Y-intercept",
+    'roots': "Roots",
+    'turning_points': "Turning Points",
+    'asymptotes': "Asymptotes",
+    'domain_range': "Domain/Range",
+    'behavior': "Behavior Analysis",
+}
+
+
+def is_valid_number(value):
+    """Check if a value is a valid finite number"""
+    try:
+        if isinstance(value, (int, float)):
+            return not (math.isnan(value) or math.isinf(value))
+        elif hasattr(value, 'is_real') and value.is_real:
+            float_val = float(value)
+            return not (math.isnan(float_val) or math.isinf(float_val))
+        else:
+            return False
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+class AnalysisResult:
+    """What the analysis found for one function on [x_min, x_max]
+
+    Each stage attribute stays None until that stage has been recorded:
+
+    - y_intercept: float, or None when f(0) is undefined (see y_intercept_text)
+    - roots: sorted list of floats
+    - turning_points: list of (x, y, kind), kind 'Maximum', 'Minimum' or 'Saddle Point'
+    - asymptotes: list of {'type': 'vertical' | 'horizontal', 'value': float}
+    - domain_range, behavior: lists of ready-made text lines
+
+    Stages that raised or ran out of time are listed in failures.
+    """
+
+    def __init__(self, function_str, x_min, x_max):
+        self.function_str = function_str
+        self.x_min = x_min
+        self.x_max = x_max
+        self.y_intercept = None
+        self.y_intercept_text = None
+        self.roots = None
+        self.turning_points = None
+        self.asymptotes = None
+        self.domain_range = None
+        self.behavior = None
+        self.failures = {}
+
+    def record(self, stage, value):
+        """Store the value returned by FunctionAnalyzer.run_stage(stage, ...)"""
+        if stage == 'y_intercept':
+            self.y_intercept, self.y_intercept_text = value
+        else:
+            setattr(self, stage, value)
+
+    def record_failure(self, stage, reason):
+        """Note that a stage could not be completed"""
+        self.failures[stage] = reason
+
+    def describe(self, stage):
+        """Text lines reporting one recorded stage"""
+        if stage in self.failures:
+            return [f"{STAGE_LABELS[stage]}: Could not complete ({self.failures[stage]})"]
+        if stage == 'y_intercept':
+            return [self.y_intercept_text] if self.y_intercept_text else []
+        if stage == 'roots' and self.roots is not None:
+            if not self.roots:
+                return ["Roots: No real roots found in range"]
+            return [f"Roots: {', '.join([f'({r:.4f}, 0)' for r in self.roots])}"]
+        if stage == 'turning_points' and self.turning_points is not None:
+            if not self.turning_points:
+                return ["Turning Points: No turning points found in range"]
+            tp_text = [f'({x_val:.4f}, {y_val:.4f}) [{tp_type}]'
+                       for x_val, y_val, tp_type in self.turning_points
+                       if is_valid_number(x_val) and is_valid_number(y_val)]
+            return [f"Turning Points: {', '.join(tp_text)}"] if tp_text else []
+        if stage == 'asymptotes' and self.asymptotes is not None:
+            if not self.asymptotes:
+                return ["Asymptotes: No asymptotes found"]
+            lines = []
+            for asym in self.asymptotes:
+                if asym['type'] == 'vertical':
+                    lines.append(f"Vertical asymptote: x = {asym['value']:.4f}")
+                elif asym['type'] == 'horizontal':
+                    lines.append(f"Horizontal asymptote: y = {asym['value']:.4f}")
+            return lines
+        if stage in ('domain_range', 'behavior'):
+            return list(getattr(self, stage) or [])
+        return []
+
+    def lines(self):
+        """Text report of every recorded stage, in stage order"""
+        return [line for stage in STAGES for line in self.describe(stage)]
+
+    def to_dict(self):
+        """Plain, JSON-serialisable form of the result"""
+        return {
+            'function': self.function_str,
+            'x_min': self.x_min,
+            'x_max': self.x_max,
+            'y_intercept': self.y_intercept,
+            'roots': self.roots,
+            'turning_points': ([{'x': x_val, 'y': y_val, 'type': tp_type}
+                                for x_val, y_val, tp_type in self.turning_points]
+                               if self.turning_points is not None else None),
+            'asymptotes': self.asymptotes,
+            'domain_range': self.domain_range,
+            'behavior': self.behavior,
+            'failures': dict(self.failures),
+        }
+
+
+class FunctionAnalyzer:
+    """Runs the analysis stages on an AnalysisContext
+
+    Symbolic solve/limit calls go through ``solver`` (a SolverService) when
+    one is given, so they are time-limited; without it they run in-process.
+    Every stage falls back to numeric methods on the shared sample grid
+    when the symbolic route fails.
+    """
+
+    def __init__(self, solver=None, expression_cache=None):
+        self.solver = solver
+        self.expression_cache = expression_cache or ExpressionCache()
+
+    def context(self, function_str, x_min, x_max, resolution=2000, degrees=True):
+        """Parse function_str (through the cache) and sample it on [x_min, x_max]"""
+        expression = self.expression_cache.get(function_str, degrees)
+        return AnalysisContext(expression, x_min, x_max, resolution)
+
+    def analyze(self, function_str, x_min, x_max, resolution=2000, degrees=True, stages=STAGES):
+        """Run the given stages for one function and return an AnalysisResult
+
+        A SympifyError from an invalid function propagates; failures inside
+        a stage are recorded on the result instead.
+        """
+        context = self.context(function_str, x_min, x_max, resolution, degrees)
+        result = AnalysisResult(function_str, x_min, x_max)
+        for stage in stages:
+            try:
+                result.record(stage, self.run_stage(stage, context))
+            except Exception as e:
+                result.record_failure(stage, str(e))
+        return result
+
+    def run_stage(self, stage, context):
+        """Compute one named stage for context"""
+        return {
+            'y_intercept': self.find_y_intercept,
+            'roots': self.find_roots,
+            'turning_points': self.find_turning_points,
+            'asymptotes': self.find_asymptotes,
+            'domain_range': self.analyze_domain_range,
+            'behavior': self.analyze_function_behavior,
+        }[stage](context)
+
+    def find_y_intercept(self, context):
+        """Find the y-intercept, returning (value or None, description)"""
+        try:
+            y_intercept_expr = context.f.subs(context.x_sym, 0)
+            if hasattr(y_intercept_expr, 'is_real') and y_intercept_expr.is_real:
+                y_intercept = float(y_intercept_expr)
+                if is_valid_number(y_intercept):
+                    return y_intercept, f"Y-intercept: (0, {y_intercept:.4f})"
+                return None, "Y-intercept: Not defined or infinite"
+            return None, "Y-intercept: Not defined or complex"
+        except (TypeError, ValueError, OverflowError):
+            return None, "Y-intercept: Not defined or complex"
+
+    def find_roots(self, context):
+        """Find roots of the function in the given range"""
+        # Try to solve f(x) = 0 (cached per expression, time-limited)
+        try:
+            roots = context.expression.solve(solver=self.solver)
+        except (SolverTimeout, SolverError, NotImplementedError):
+            # Out of budget or unsolvable; rely on the numeric scan below
+            roots = []
+        real_roots = []
+
+        for root in roots:
+            try:
+                if hasattr(root, 'is_real') and root.is_real:
+                    root_val = float(root)
+                    if context.x_min <= root_val <= context.x_max:
+                        real_roots.append(root_val)
+            except (TypeError, ValueError, OverflowError):
+                # Complex root or conversion error, skip
+                continue
+
+        # Also isolate roots numerically from the shared sample grid,
+        # refined to machine precision; poles are rejected via f'
+        numeric_roots = isolate_roots(context.x, context.y,
+                                      context.compiled(0), context.compiled(1))
+        real_roots.extend(numeric_roots)
+
+        return merge_close(real_roots, context.x_max - context.x_min).tolist()
+
+    def find_turning_points(self, context, exact=False):
+        """Find turning points (critical points) of the function
+
+        Zeros of f' are isolated numerically on the shared grid and
+        classified with the compiled f''. With exact=True, sp.solve(f')
+        (cached and time-limited) runs as an extra pass: its real solutions
+        replace the matching numeric ones and add any the grid missed.
+        """
+        f, f_prime, f_double_prime = context.compiled(0), context.compiled(1), context.compiled(2)
+        width = context.x_max - context.x_min
+        turning_points = find_turning_points(context.x, context.dy, f, f_prime, f_double_prime)
+        if not exact:
+            return turning_points
+
+        try:
+            critical_points = context.expression.solve(1, solver=self.solver)
+        except (SolverTimeout, SolverError, NotImplementedError):
+            # Out of budget or unsolvable; keep the numeric result
+            return turning_points
+        exact_points = []
+        for cp in critical_points:
+            try:
+                if hasattr(cp, 'is_real') and cp.is_real:
+                    x_val = float(cp)
+                    if context.x_min <= x_val <= context.x_max:
+                        exact_points.append(x_val)
+            except (TypeError, ValueError, OverflowError):
+                continue
+
+        # Exact solutions win over numeric ones at the same place
+        points = list(exact_points)
+        for x_val, _, _ in turning_points:
+            if all(abs(x_val - p) > 1e-6 * (1 + abs(p)) for p in exact_points):
+                points.append(x_val)
+        return classify_critical_points(merge_close(points, width), f, f_prime, f_double_prime, width)
+
+    def numeric_limit(self, context, direction):
+        """Estimate the limit of f as x -> direction * infinity, or None if it diverges
+
+        f must settle over a dense tail sample, not just agree at a few
+        points: 1e4, 1e5, ... are all 280 mod 360, so in degree mode sin(x)
+        would look constant there. An oscillating tail gives None.
+        """
+        x_far = direction * np.geomspace(1e6, 1e7, LIMIT_TAIL_SAMPLES)
+        y_far = np.asarray(context.compiled(0)(x_far), dtype=float)
+        if not np.all(np.isfinite(y_far)):
+            return None
+        if np.ptp(y_far) > 1e-6 * (1 + abs(y_far[-1])):
+            return None
+        return sp.Float(round(y_far[-1], 6))
+
+    def find_asymptotes(self, context):
+        """Find vertical and horizontal asymptotes"""
+        asymptotes = []
+        f, x_sym = context.f, context.x_sym
+
+        # Check for vertical asymptotes: poles detected on the shared grid,
+        # confirmed against the denominator's zeros when that is cheap
+        breaks, poles = context.discontinuities()
+        zeros = denominator_zeros(f, x_sym)
+        if zeros is not None:
+            poles = [z for z in zeros
+                     if any(abs(p - z) <= 1e-6 * (1 + abs(z)) for p in poles)]
+        for pole in poles:
+            asymptotes.append({'type': 'vertical', 'value': pole})
+
+        # Check for horizontal asymptotes using limits
+        try:
+            limit_pos = context.expression.limit(sp.oo, solver=self.solver)
+            limit_neg = context.expression.limit(-sp.oo, solver=self.solver)
+        except (SolverTimeout, SolverError, NotImplementedError):
+            # Out of budget or unsupported; estimate the limits numerically
+            limit_pos = self.numeric_limit(context, 1)
+            limit_neg = self.numeric_limit(context, -1)
+
+        try:
+            # Check if limits are finite and equal
+            if (limit_pos == limit_neg and
+                limit_pos != sp.oo and limit_pos != -sp.oo and
+                limit_pos != sp.zoo and limit_pos != -sp.zoo):
+                asymptotes.append({'type': 'horizontal', 'value': float(limit_pos)})
+            elif (limit_pos != sp.oo and limit_pos != -sp.oo and
+                  limit_pos != sp.zoo and limit_pos != -sp.zoo):
+                asymptotes.append({'type': 'horizontal', 'value': float(limit_pos)})
+        except (TypeError, ValueError, OverflowError):
+            # No limit (None), or one that is not a plain number such as AccumBounds
+            pass
+
+        return asymptotes
+
+    def analyze_domain_range(self, context):
+        """Analyze domain and range of the function"""
+        results = []
+
+        try:
+            y_sample = context.y[np.isfinite(context.y)]
+
+            if y_sample.size:
+                y_min_sample = float(y_sample.min())
+                y_max_sample = float(y_sample.max())
+
+                results.append(f"Domain: [{context.x_min}, {context.x_max}]")
+                results.append(f"Range (approximate): [{y_min_sample:.4f}, {y_max_sample:.4f}]")
+            else:
+                results.append("Domain/Range: Could not determine")
+
+        except Exception as e:
+            results.append("Domain/Range: Could not determine")
+
+        return results
+
+    def find_symmetry(self, context):
+        """Return (kind, confirmed): kind is 'even', 'odd' or None from the samples
+
+        confirmed is True when a cheap symbolic check (only tried on small
+        expressions) agrees with the numeric verdict.
+        """
+        kind = symmetry(context.compiled(0), context.x, context.y)
+        confirmed = False
+        if kind is not None and sp.count_ops(context.f) <= SYMBOLIC_CHECK_OPS:
+            f_neg_x = context.f.subs(context.x_sym, -context.x_sym)
+            difference = context.f - f_neg_x if kind == 'even' else context.f + f_neg_x
+            confirmed = sp.expand(difference) == 0
+        return kind, confirmed
+
+    def find_period(self, context):
+        """Return (period, exact): the period as a float (or None) and its exact form
+
+        The period is estimated from the samples. When a solver service is
+        available and the expression is small, sp.periodicity is asked too,
+        under a short time limit; its answer is used if it agrees with the
+        estimate, or if the period is too long to show up in the range.
+        """
+        period = estimate_period(context.compiled(0), context.x, context.y)
+        if self.solver is None or sp.count_ops(context.f) > SYMBOLIC_CHECK_OPS:
+            return period, None
+        try:
+            exact = context.expression.period(self.solver, SYMBOLIC_CHECK_TIMEOUT)
+            value = float(exact) if exact is not None else None
+        except (SolverTimeout, SolverError, NotImplementedError, TypeError):
+            return period, None
+        if value is None or value <= 0:
+            return period, None
+        if period is None or abs(value - period) <= 1e-6 * value:
+            return value, exact
+        return period, None
+
+    def analyze_function_behavior(self, context):
+        """Analyze additional function behavior"""
+        results = []
+
+        try:
+            # Check for symmetry by comparing f(x) with f(-x) on the grid
+            kind, confirmed = self.find_symmetry(context)
+            checked = "" if confirmed else " - checked numerically"
+            if kind == 'even':
+                results.append(f"Symmetry: Even function (symmetric about y-axis){checked}")
+            elif kind == 'odd':
+                results.append(f"Symmetry: Odd function (symmetric about origin){checked}")
+            else:
+                results.append("Symmetry: Neither even nor odd")
+
+            # Check for periodicity from the samples, exact period when cheap
+            period, exact = self.find_period(context)
+            if exact is not None:
+                approx = "" if exact.is_Integer else f" ≈ {period:.4f}"
+                results.append(f"Periodicity: Periodic with period {exact}{approx}")
+            elif period is not None:
+                results.append(f"Periodicity: Function appears to be periodic with period ≈ {period:.4f}")
+            else:
+                results.append("Periodicity: Function appears to be non-periodic")
+
+            # Check if the sampled derivative is always positive/negative
+            # (undefined points count as zero, as before)
+            derivative_signs = np.sign(np.nan_to_num(context.dy, nan=0.0))
+
+            if np.all(derivative_signs >= 0):
+                results.append("Monotonicity: Function is increasing in the given range")
+            elif np.all(derivative_signs <= 0):
+                results.append("Monotonicity: Function is decreasing in the given range")
+            else:
+                results.append("Monotonicity: Function is neither strictly increasing nor decreasing")
+
+            # Check for boundedness
+            y_sample = context.y[np.isfinite(context.y)]
+
+            if y_sample.size:
+                y_min_sample = y_sample.min()
+                y_max_sample = y_sample.max()
+
+                if abs(y_min_sample) < 1e6 and abs(y_max_sample) < 1e6:
+                    results.append("Boundedness: Function appears to be bounded in the given range")
+                else:
+                    results.append("Boundedness: Function appears to be unbounded in the given range")
+            else:
+                results.append("Boundedness: Could not determine")
+
+        except Exception as e:
+            results.append("Behavior Analysis: Could not determine function behavior")
+
+        return results
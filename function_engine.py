@@ -0,0 +1,856 @@
+"""Numeric evaluation engine for the graphical calculator.
+
+Parses user function strings into SymPy expressions and compiles them into
+vectorised NumPy callables, so a whole sample grid is evaluated in one call
+instead of one ``subs`` per point.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import sympy as sp
+
+from expression_compiler import validate, number, DEGREE_FUNCTIONS
+from numeric_methods import (find_discontinuities, adaptive_sample, split_segments,
+                             arc_length, polygon_area, polar_area, implicit_contour,
+                             segments_to_polyline)
+
+# The independent variable used by every graph screen. It is declared real, so
+# derivatives of abs(x) or floor(x) come out as sign(x) or 0, not Derivative(re(x), x)
+X = sp.Symbol('x', real=True)
+
+# Curve parameter of parametric curves and angle of polar curves
+T = sp.Symbol('t')
+THETA = sp.Symbol('theta')
+
+# Second plane coordinate, for implicit curves
+Y = sp.Symbol('y')
+
+# Names the user may type that SymPy does not know by default, and x as the real X
+PARSE_LOCALS = {'e': sp.E, 'x': X}
+
+# Modules tried by lambdify, in order of preference
+NUMERIC_MODULES = ['numpy', 'scipy']
+
+# Most curves a single graph will overlay
+MAX_CURVES = 24
+
+# Most free parameters that get a live slider on the graph screen
+MAX_SLIDERS = 6
+
+# Parameter samples per parametric or polar curve
+PARAMETRIC_SAMPLES = 40000
+
+# Coarse grid size and refinement of an implicit curve (250 * 4 matches a 1000 x 1000 grid)
+IMPLICIT_GRID = 250
+IMPLICIT_REFINE = 4
+
+# Samples along each axis of a z = f(x, y) grid
+SURFACE_GRID = 200
+
+
+def deg_replace(expr):
+    """Rewrite the trig functions in DEGREE_FUNCTIONS so their arguments are read in degrees
+
+    The list is the expression compiler's, so the calculator and the graph
+    screens agree on which functions take degrees.
+    """
+    return expr.replace(
+        lambda node: isinstance(node, sp.Function) and node.func.__name__ in DEGREE_FUNCTIONS,
+        lambda node: node.func(node.args[0] * sp.pi / 180)
+    )
+
+
+def parse_function(function_str, degrees=True):
+    """Parse a function string into a SymPy expression of x
+
+    The string is checked against the expression compiler's allow-list
+    first, since SymPy's parser evaluates its input as Python.
+    """
+    expr = sp.sympify(validate(function_str), locals=PARSE_LOCALS)
+    if degrees:
+        expr = deg_replace(expr)
+    return expr
+
+
+class CompiledFunction:
+    """Vectorised numeric callable for a SymPy expression
+
+    x_sym is one symbol, or a tuple of symbols for a function of several
+    variables, which is then called with one array per variable (arrays
+    are broadcast together). Calling the object with arrays evaluates every
+    point in one NumPy call. Domain errors, poles and complex results come
+    back as NaN rather than raising, matching how the plot treats undefined
+    points.
+    """
+
+    def __init__(self, expr, x_sym=X):
+        self.expr = expr
+        self.x_sym = x_sym
+        try:
+            self._func = sp.lambdify(x_sym, expr, modules=NUMERIC_MODULES)
+        except Exception:
+            self._func = None
+        self._scalar_func = None
+
+    def __call__(self, *values):
+        """Evaluate the expression at every point of the given arrays"""
+        arrays = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in values])
+        shape = arrays[0].shape
+        with np.errstate(all='ignore'):
+            y_values = None
+            if self._func is not None:
+                try:
+                    y_values = self._func(*arrays)
+                except (TypeError, ValueError, ArithmeticError, AttributeError, NameError):
+                    y_values = None
+            if y_values is None:
+                y_values = self._evaluate_pointwise(arrays, shape)
+            return self._to_real(y_values, shape)
+
+    def _evaluate_pointwise(self, arrays, shape):
+        """Slow fallback for expressions NumPy cannot evaluate as arrays"""
+        if self._scalar_func is None:
+            try:
+                self._scalar_func = sp.lambdify(self.x_sym, self.expr, modules='mpmath')
+            except Exception:
+                # Nothing can print it as code (e.g. an unevaluated Derivative): undefined everywhere
+                self._scalar_func = False
+        if self._scalar_func is False:
+            return np.full(shape, np.nan)
+        y_values = np.empty(shape, dtype=complex)
+        for index in np.ndindex(shape):
+            try:
+                y_values[index] = complex(self._scalar_func(*[float(array[index]) for array in arrays]))
+            except (TypeError, ValueError, ArithmeticError, AttributeError, NameError,
+                    NotImplementedError):
+                # NameError: a function mpmath lacks, such as DiracDelta in abs(x)''
+                y_values[index] = np.nan
+        return y_values
+
+    @staticmethod
+    def _to_real(y_values, shape):
+        """Convert raw results to a float array, with NaN for undefined points"""
+        y_values = np.asarray(y_values)
+        if np.iscomplexobj(y_values):
+            real = y_values.real
+            imaginary = np.abs(y_values.imag)
+            y_values = np.where(imaginary <= 1e-12 * (1 + np.abs(real)), real, np.nan)
+        try:
+            y_values = np.array(np.broadcast_to(y_values, shape), dtype=float)
+        except (TypeError, ValueError):
+            return np.full(shape, np.nan)
+        y_values[~np.isfinite(y_values)] = np.nan
+        return y_values
+
+
+def parse_parameter_range(spec):
+    """Parse a curve-family parameter such as 'n = 1:8' into (symbol, values)
+
+    Accepts 'name = start:stop' (step 1), 'name = start:stop:step' (both
+    include stop) or 'name = v1, v2, ...'. Raises ValueError on bad input.
+    """
+    name, separator, values_str = spec.partition('=')
+    name = name.strip()
+    if not separator or not name.isidentifier() or name in ('x', 'e'):
+        raise ValueError("Parameter must look like 'n = 1:8' or 'a = 1, 2, 5'")
+    try:
+        if ':' in values_str:
+            bounds = [number(part) for part in values_str.split(':')]
+            if len(bounds) not in (2, 3):
+                raise ValueError
+            start, stop = bounds[0], bounds[1]
+            step = bounds[2] if len(bounds) == 3 else 1.0
+            if step <= 0 or stop < start:
+                raise ValueError
+            values = np.arange(start, stop + step / 2, step)
+        else:
+            values = np.array([number(part) for part in values_str.split(',')])
+    except ValueError:
+        raise ValueError(f"Invalid parameter values: {values_str.strip()}")
+    if values.size == 0 or values.size > MAX_CURVES:
+        raise ValueError(f"A parameter range must give between 1 and {MAX_CURVES} values")
+    return sp.Symbol(name), values
+
+
+def exact_value(value):
+    """SymPy number for value, keeping whole numbers exact (x**2, not x**2.0)"""
+    return sp.Integer(int(value)) if float(value).is_integer() else sp.Float(value)
+
+
+def free_parameters(function_strs, exclude=()):
+    """Symbols other than x used by the function strings, sorted by name"""
+    symbols = set()
+    for function_str in function_strs:
+        symbols |= parse_function(function_str, degrees=False).free_symbols
+    symbols -= {X, *exclude}
+    return sorted(symbols, key=lambda symbol: symbol.name)
+
+
+def compile_function(expr, x_sym=X):
+    """Compile a SymPy expression into a vectorised numeric callable"""
+    return CompiledFunction(expr, x_sym)
+
+
+def denominator_zeros(expr, x_sym, max_degree=8):
+    """Real zeros of the denominator of a rational function, or None
+
+    Only attempted when it is cheap: expr must be a rational function whose
+    cancelled denominator is a polynomial of modest degree. Otherwise None
+    is returned and callers rely on numeric pole detection alone.
+    """
+    if not expr.is_rational_function(x_sym):
+        return None
+    denominator = sp.denom(sp.cancel(sp.together(expr)))
+    try:
+        poly = sp.Poly(denominator, x_sym)
+    except sp.PolynomialError:
+        return None
+    if poly.degree() > max_degree:
+        return None
+    if poly.degree() < 1:
+        return []
+    # Square-free part, so repeated factors such as x**2 give a single zero
+    zeros = np.roots([float(c) for c in sp.Poly(sp.sqf_part(poly.as_expr()), x_sym).all_coeffs()])
+    return sorted(float(z.real) for z in zeros if abs(z.imag) <= 1e-9 * (1 + abs(z.real)))
+
+
+class CompiledExpression:
+    """A parsed function together with everything derived from it
+
+    Derivatives, compiled callables and symbolic solve/limit/integrate
+    results are computed on first use and kept, so a cached entry answers
+    repeat requests without touching SymPy. A rough size estimate is kept up
+    to date for the cache's memory limit.
+    """
+
+    # Estimated footprint of one lambdified callable, in bytes
+    COMPILED_SIZE = 4096
+
+    def __init__(self, function_str, degrees=True, expr=None):
+        self.function_str = function_str
+        self.degrees = degrees
+        self.x_sym = X
+        if expr is None:
+            self.expr = parse_function(function_str, degrees)
+        else:
+            # Already parsed (with trig in radians), e.g. a curve family member
+            self.expr = deg_replace(expr) if degrees else expr
+        self._derivatives = {0: self.expr}
+        self._compiled = {}
+        self._symbolic = {}
+        self.nbytes = self._estimate(self.expr)
+
+    @staticmethod
+    def _estimate(value):
+        """Rough memory estimate for a cached SymPy result"""
+        return 64 + 2 * len(sp.srepr(value))
+
+    def derivative(self, order=1):
+        """Symbolic derivative of the given order"""
+        if order not in self._derivatives:
+            derivative = sp.diff(self.derivative(order - 1), self.x_sym)
+            self._derivatives[order] = derivative
+            self.nbytes += self._estimate(derivative)
+        return self._derivatives[order]
+
+    def compiled(self, order=0):
+        """Compiled numeric callable for the derivative of the given order"""
+        if order not in self._compiled:
+            self._compiled[order] = compile_function(self.derivative(order), self.x_sym)
+            self.nbytes += self.COMPILED_SIZE
+        return self._compiled[order]
+
+    def _symbolic_result(self, key, compute):
+        """Compute a symbolic result once, remembering failures too"""
+        if key not in self._symbolic:
+            try:
+                self._symbolic[key] = (True, compute())
+            except Exception as e:
+                self._symbolic[key] = (False, e)
+            self.nbytes += self._estimate(self._symbolic[key][1])
+        succeeded, value = self._symbolic[key]
+        if not succeeded:
+            raise value
+        return value
+
+    def solve(self, order=0, solver=None):
+        """Solutions of f^(order)(x) = 0 from sp.solve
+
+        With a SolverService the call runs in a worker process under its time
+        limit; a timeout is cached like any other failure.
+        """
+        expr = self.derivative(order)
+        if solver is None:
+            compute = lambda: sp.solve(expr, self.x_sym)
+        else:
+            compute = lambda: solver.solve(expr, self.x_sym)
+        return self._symbolic_result(('solve', order), compute)
+
+    def limit(self, point, solver=None):
+        """Limit of f as x tends to point, optionally via a SolverService"""
+        if solver is None:
+            compute = lambda: sp.limit(self.expr, self.x_sym, point)
+        else:
+            compute = lambda: solver.limit(self.expr, self.x_sym, point)
+        return self._symbolic_result(('limit', point), compute)
+
+    def period(self, solver=None, timeout=None):
+        """Fundamental period of f from sp.periodicity (None if not periodic)"""
+        if solver is None:
+            compute = lambda: sp.periodicity(self.expr, self.x_sym)
+        else:
+            compute = lambda: solver.periodicity(self.expr, self.x_sym, timeout=timeout)
+        return self._symbolic_result(('periodicity',), compute)
+
+    def integral(self, solver=None):
+        """Indefinite integral of f from sp.integrate, optionally via a SolverService"""
+        if solver is None:
+            compute = lambda: sp.integrate(self.expr, self.x_sym)
+        else:
+            compute = lambda: solver.integrate(self.expr, self.x_sym)
+        return self._symbolic_result(('integrate',), compute)
+
+    def definite_integral(self, a, b, solver=None):
+        """Exact integral of f from a to b from sp.integrate, optionally via a SolverService"""
+        if solver is None:
+            compute = lambda: sp.integrate(self.expr, (self.x_sym, a, b))
+        else:
+            compute = lambda: solver.definite_integral(self.expr, self.x_sym, a, b)
+        return self._symbolic_result(('integrate', a, b), compute)
+
+
+class ExpressionCache:
+    """Bounded LRU cache of CompiledExpression objects
+
+    Entries are keyed by the normalised function string and the degree/radian
+    mode. The least recently used entries are evicted once either the entry
+    count or the estimated memory use goes over its limit.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(function_str):
+        """Canonical form of a function string used as the cache key
+
+        Only the key: spaces between two names or numbers are kept, so "x y"
+        (which does not parse) never shares an entry with the symbol "xy".
+        """
+        text = re.sub(r'\s+', ' ', function_str.strip())
+        return re.sub(r'(?<!\w) | (?!\w)', '', text).replace('^', '**')
+
+    def get(self, function_str, degrees=True, expr=None):
+        """Return the cached CompiledExpression, parsing it on a miss
+
+        expr may give the already parsed function (trig in radians), for
+        expressions SymPy built itself and which need not parse back from
+        their printed form, such as zoo*x.
+        """
+        key = (self.normalize(function_str), degrees)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                self._evict()
+                return entry
+            self.misses += 1
+        # Parse the input as typed, outside the lock; an ExpressionError or
+        # SympifyError propagates to the caller
+        entry = CompiledExpression(function_str, degrees, expr)
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            self._evict()
+        return entry
+
+    def _evict(self):
+        """Drop least recently used entries until both limits hold"""
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self.memory_usage() > self.max_bytes):
+            self._entries.popitem(last=False)
+
+    def memory_usage(self):
+        """Estimated bytes held by all cached entries"""
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self):
+        """Hit/miss counters and current size of the cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.memory_usage(),
+            }
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class AnalysisContext:
+    """Shared sample grid for one analysis of a function over [x_min, x_max]
+
+    Derivatives and compiled callables come from the CompiledExpression, and
+    each order is sampled at most once; every analysis pass reads the cached
+    arrays instead of evaluating the function again.
+    """
+
+    def __init__(self, expression, x_min, x_max, resolution=2000):
+        self.expression = expression
+        self.f = expression.expr
+        self.x_sym = expression.x_sym
+        self.x_min = x_min
+        self.x_max = x_max
+        self.resolution = resolution
+        self.x = np.linspace(x_min, x_max, resolution)
+        self._samples = {}
+        self._discontinuities = None
+        self._curves = {}
+
+    def derivative(self, order=1):
+        """Symbolic derivative of f of the given order"""
+        return self.expression.derivative(order)
+
+    def discontinuities(self):
+        """(breaks, poles) of f on the shared grid, detected once"""
+        if self._discontinuities is None:
+            self._discontinuities = find_discontinuities(self.x, self.y, self.compiled(0))
+        return self._discontinuities
+
+    def curve(self, max_points=4000, seed_points=256):
+        """Adaptively sampled (x, y) for drawing, split at every discontinuity
+
+        Seeded from a coarse subset of the shared grid, so only the points
+        added by refinement are evaluated again.
+        """
+        if max_points not in self._curves:
+            stride = max(1, (len(self.x) - 1) // seed_points)
+            seed = np.unique(np.r_[np.arange(0, len(self.x), stride), len(self.x) - 1])
+            breaks, _ = self.discontinuities()
+            x, y = adaptive_sample(self.compiled(0), self.x[seed], self.y[seed],
+                                   max_points, breaks=breaks)
+            self._curves[max_points] = split_segments(x, y, breaks)
+        return self._curves[max_points]
+
+    def compiled(self, order=0):
+        """Compiled numeric callable for the derivative of the given order"""
+        return self.expression.compiled(order)
+
+    def set_samples(self, order, values):
+        """Use values already computed on the shared grid for this order"""
+        self._samples[order] = values
+
+    def samples(self, order=0):
+        """Values of the derivative of the given order on the shared grid"""
+        if order not in self._samples:
+            self._samples[order] = self.compiled(order)(self.x)
+        return self._samples[order]
+
+    @property
+    def y(self):
+        """Sampled values of f"""
+        return self.samples(0)
+
+    @property
+    def dy(self):
+        """Sampled values of f'"""
+        return self.samples(1)
+
+    @property
+    def d2y(self):
+        """Sampled values of f''"""
+        return self.samples(2)
+
+
+class CurveFamily:
+    """Several functions of x analysed together on one shared grid
+
+    Every function string containing the parameter symbol is expanded into
+    one member per parameter value. For each derivative order all members
+    are evaluated in one stacked computation: the plain functions through a
+    single lambdified list (sharing common subexpressions) and each
+    parameter family by broadcasting its values against the grid. Each
+    member's AnalysisContext is then handed its row of the result.
+
+    Slider parameters (a dict of symbol -> value) are substituted into the
+    members for analysis, while live_values re-evaluates every curve for new
+    slider values with callables compiled once, taking the sliders as extra
+    arguments.
+    """
+
+    def __init__(self, cache, function_strs, x_min, x_max, resolution=2000,
+                 parameter=None, sliders=None, degrees=True):
+        symbol, values = parameter if parameter is not None else (None, None)
+        sliders = sliders or {}
+        slider_values = {slider: exact_value(value) for slider, value in sliders.items()}
+        self.parameter = symbol
+        self.sliders = list(sliders)
+        self.x = np.linspace(x_min, x_max, resolution)
+        self.members = []
+        self.labels = []
+        self._plain = []
+        self._families = []
+        self._live = []
+        self._live_funcs = None
+        self._samples = {}
+        for function_str in function_strs:
+            template = parse_function(function_str, degrees=False)
+            live = deg_replace(template) if degrees else template
+            fixed = template.subs(slider_values)
+            if symbol is None or symbol not in template.free_symbols:
+                self._plain.append(len(self.members))
+                self._live.append(([len(self.members)], live, None))
+                if sliders:
+                    self.members.append(cache.get(str(fixed), degrees, expr=fixed))
+                else:
+                    self.members.append(cache.get(function_str, degrees))
+                self.labels.append(function_str)
+                continue
+            indices = list(range(len(self.members), len(self.members) + len(values)))
+            for value in values:
+                member = fixed.subs(symbol, exact_value(value))
+                self.members.append(cache.get(str(member), degrees, expr=member))
+                self.labels.append(f'{function_str}, {symbol} = {value:g}')
+            self._families.append((indices, deg_replace(fixed) if degrees else fixed, values))
+            self._live.append((indices, live, values))
+        if len(self.members) > MAX_CURVES:
+            raise ValueError(f"At most {MAX_CURVES} curves can be plotted together")
+        self.contexts = [AnalysisContext(member, x_min, x_max, resolution) for member in self.members]
+
+    def samples(self, order=0):
+        """Stacked values of every member's derivative of the given order"""
+        if order not in self._samples:
+            rows = np.empty((len(self.members), len(self.x)))
+            with np.errstate(all='ignore'):
+                if self._plain:
+                    exprs = [self.members[i].derivative(order) for i in self._plain]
+                    rows[self._plain] = self._evaluate(
+                        lambda: sp.lambdify(X, exprs, modules=NUMERIC_MODULES, cse=True)(self.x),
+                        self._plain, order)
+                for indices, template, values in self._families:
+                    expr = sp.diff(template, X, order)
+                    rows[indices] = self._evaluate(
+                        lambda: sp.lambdify((X, self.parameter), expr, modules=NUMERIC_MODULES)(
+                            self.x[np.newaxis, :], values[:, np.newaxis]),
+                        indices, order)
+            self._samples[order] = rows
+            for context, row in zip(self.contexts, rows):
+                context.set_samples(order, row)
+        return self._samples[order]
+
+    def _evaluate(self, stacked, indices, order):
+        """Run one stacked evaluation, falling back to each member's own callable"""
+        shape = self.x.shape
+        try:
+            values = stacked()
+            if not isinstance(values, list):
+                # A parameter family may not depend on x or on its parameter
+                values = np.broadcast_to(np.asarray(values), (len(indices),) + shape)
+            return [CompiledFunction._to_real(row, shape) for row in values]
+        except (TypeError, ValueError, ArithmeticError, AttributeError, NameError,
+                LookupError, NotImplementedError):
+            # Including lambdify's printer failures (unprintable Derivative, zoo), which
+            # the members' own callables turn into NaN
+            return [self.members[i].compiled(order)(self.x) for i in indices]
+
+    def live_values(self, x, slider_values):
+        """Every member's values at x for new slider values, without re-parsing
+
+        slider_values follow the order of self.sliders. Each function is
+        lambdified once, with the sliders (and any family parameter) as extra
+        arguments, so a slider drag costs one vectorised call per function.
+        """
+        if self._live_funcs is None:
+            self._live_funcs = []
+            for indices, expr, values in self._live:
+                args = (X, *self.sliders) if values is None else (X, self.parameter, *self.sliders)
+                try:
+                    func = sp.lambdify(args, expr, modules=NUMERIC_MODULES)
+                except Exception:
+                    func = None
+                self._live_funcs.append(func)
+
+        x = np.asarray(x, dtype=float)
+        rows = np.full((len(self.members), len(x)), np.nan)
+        with np.errstate(all='ignore'):
+            for (indices, _, values), func in zip(self._live, self._live_funcs):
+                if func is None:
+                    continue
+                try:
+                    if values is None:
+                        result = func(x, *slider_values)
+                    else:
+                        result = func(x[np.newaxis, :], values[:, np.newaxis], *slider_values)
+                    result = np.broadcast_to(np.asarray(result), (len(indices),) + x.shape)
+                except (TypeError, ValueError, ArithmeticError, AttributeError, NameError):
+                    continue
+                rows[indices] = [CompiledFunction._to_real(row, x.shape) for row in result]
+        return rows
+
+    def prepare(self, *orders):
+        """Sample the given derivative orders for every member; returns the contexts"""
+        for order in orders:
+            self.samples(order)
+        return self.contexts
+
+
+class ParametricCurve:
+    """Plane curve (x(t), y(t)), or r(theta) in polar form, sampled in one pass
+
+    Each component is compiled once and evaluated over the whole parameter
+    grid in a single vectorised call. The points are split wherever a
+    component jumps or has a pole, and the arc length and area are computed
+    from those same arrays. With degrees set, trig arguments and the polar
+    angle are read in degrees, as on the rest of the graph screen.
+    """
+
+    def __init__(self, components, t_min, t_max, samples=PARAMETRIC_SAMPLES,
+                 degrees=True, polar=False):
+        parameter = THETA if polar else T
+        exprs = [parse_function(component.replace('θ', 'theta'), degrees) for component in components]
+        if len(exprs) != (1 if polar else 2):
+            raise ValueError("Enter r(theta)" if polar else "Enter x(t) and y(t) separated by ';'")
+        for expr in exprs:
+            unknown = expr.free_symbols - {parameter}
+            if unknown:
+                names = ', '.join(sorted(symbol.name for symbol in unknown))
+                raise ValueError(f"Only {parameter} may be used, not {names}")
+        self.components = list(components)
+        self.polar = polar
+        self.degrees = degrees
+        self.t = np.linspace(t_min, t_max, samples)
+        funcs = [compile_function(expr, parameter) for expr in exprs]
+        values = [func(self.t) for func in funcs]
+        breaks = []
+        for func, component_values in zip(funcs, values):
+            breaks += find_discontinuities(self.t, component_values, func)[0]
+        if polar:
+            self.r = values[0]
+            self.angle = np.radians(self.t) if degrees else self.t
+            self.x = self.r * np.cos(self.angle)
+            self.y = self.r * np.sin(self.angle)
+        else:
+            self.x, self.y = values
+        self.breaks = sorted(breaks)
+
+    def curve(self):
+        """(x, y) for drawing, with a NaN point at every break"""
+        breaks = np.asarray(self.breaks, dtype=float)
+        breaks = breaks[(breaks > self.t[0]) & (breaks < self.t[-1])]
+        positions = np.searchsorted(self.t, breaks)
+        return np.insert(self.x, positions, np.nan), np.insert(self.y, positions, np.nan)
+
+    def arc_length(self):
+        """Length of the curve over the parameter range, not counting jumps"""
+        return arc_length(*self.curve())
+
+    def is_closed(self):
+        """True if the curve ends where it starts"""
+        finite = np.isfinite(self.x) & np.isfinite(self.y)
+        if not finite[0] or not finite[-1]:
+            return False
+        size = max(np.ptp(self.x[finite]), np.ptp(self.y[finite]), 1e-12)
+        return bool(np.hypot(self.x[-1] - self.x[0], self.y[-1] - self.y[0]) <= 1e-6 * size)
+
+    def area(self):
+        """Enclosed area: 1/2 * integral of r**2 for a polar curve, else the
+        shoelace area of a closed curve (None if it is not closed)
+
+        Loops traced in opposite directions count with opposite signs, so a
+        figure-eight encloses no net area.
+        """
+        if self.polar:
+            return polar_area(self.angle, self.r)
+        if not self.is_closed():
+            return None
+        finite = np.isfinite(self.x) & np.isfinite(self.y)
+        size = max(np.ptp(self.x[finite]), np.ptp(self.y[finite]))
+        area = abs(polygon_area(self.x, self.y))
+        # Cancelling loops leave only rounding error
+        return area if area > 1e-9 * size ** 2 else 0.0
+
+
+class ImplicitCurve:
+    """Curve F(x, y) = 0 traced over a rectangle by refined marching squares
+
+    The equation may be written 'lhs = rhs' or as a bare expression F, read
+    as F = 0. F is compiled once as a vectorised function of x and y, and
+    all points of each refinement level are evaluated in a single call.
+    """
+
+    def __init__(self, equation_str, x_min, x_max, y_min, y_max, resolution=IMPLICIT_GRID,
+                 refine=IMPLICIT_REFINE, degrees=True):
+        lhs, separator, rhs = equation_str.partition('=')
+        if '=' in rhs:
+            raise ValueError("Enter a single equation such as x**2 + y**2 = 25")
+        expr = parse_function(lhs, degrees)
+        if separator:
+            expr = expr - parse_function(rhs, degrees)
+        unknown = expr.free_symbols - {X, Y}
+        if unknown:
+            names = ', '.join(sorted(symbol.name for symbol in unknown))
+            raise ValueError(f"Only x and y may be used, not {names}")
+        self.equation = equation_str
+        self.expr = expr
+        self.func = compile_function(expr, (X, Y))
+        self.segments = implicit_contour(self.func, x_min, x_max, y_min, y_max, resolution, refine)
+
+    def curve(self):
+        """(x, y) for drawing every contour segment, separated by NaN points"""
+        return segments_to_polyline(self.segments)
+
+    def length(self):
+        """Total length of the curve inside the rectangle"""
+        return float(np.hypot(*(self.segments[:, 1] - self.segments[:, 0]).T).sum())
+
+
+class SurfaceGrid:
+    """z = f(x, y) sampled on a rectangular meshgrid in one vectorised call"""
+
+    def __init__(self, function_str, x_min, x_max, y_min, y_max, resolution=SURFACE_GRID,
+                 degrees=True):
+        expr = parse_function(function_str, degrees)
+        unknown = expr.free_symbols - {X, Y}
+        if unknown:
+            names = ', '.join(sorted(symbol.name for symbol in unknown))
+            raise ValueError(f"Only x and y may be used, not {names}")
+        self.function_str = function_str
+        self.bounds = (x_min, x_max, y_min, y_max)
+        self.X, self.Y = np.meshgrid(np.linspace(x_min, x_max, resolution),
+                                     np.linspace(y_min, y_max, resolution))
+        self.Z = compile_function(expr, (X, Y))(self.X, self.Y)
+        self.nbytes = self.X.nbytes + self.Y.nbytes + self.Z.nbytes
+        self._decimated = {}
+
+    def decimated(self, max_size):
+        """(X, Y, Z) thinned to at most about max_size samples per axis, kept for reuse"""
+        stride = max(1, int(np.ceil(self.Z.shape[0] / max_size)))
+        if stride not in self._decimated:
+            view = (slice(None, None, stride), slice(None, None, stride))
+            self._decimated[stride] = (self.X[view], self.Y[view], self.Z[view])
+        return self._decimated[stride]
+
+    def z_limits(self):
+        """Range of z for display, cutting off the extreme 1% at an end only
+        when it reaches far beyond the rest (a pole)
+        """
+        finite = self.Z[np.isfinite(self.Z)]
+        if finite.size == 0:
+            return None
+        low, high = np.percentile(finite, [1, 99])
+        spread = high - low
+        if finite.min() >= low - spread:
+            low = finite.min()
+        if finite.max() <= high + spread:
+            high = finite.max()
+        if high - low <= 1e-12 * max(1.0, abs(high)):
+            low, high = low - 1, high + 1
+        return float(low), float(high)
+
+
+class SurfaceGridCache:
+    """Bounded LRU cache of SurfaceGrids keyed by expression, bounds and resolution"""
+
+    def __init__(self, max_entries=8, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, function_str, x_min, x_max, y_min, y_max, resolution=SURFACE_GRID, degrees=True):
+        """Return the cached SurfaceGrid, evaluating it on a miss"""
+        key = (ExpressionCache.normalize(function_str), x_min, x_max, y_min, y_max,
+               resolution, degrees)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            self.misses += 1
+        entry = SurfaceGrid(function_str, x_min, x_max, y_min, y_max, resolution, degrees)
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_entries
+                    or sum(grid.nbytes for grid in self._entries.values()) > self.max_bytes):
+                self._entries.popitem(last=False)
+        return entry
+
+
+class TileCache:
+    """Sampled tiles of one function at several resolution levels
+
+    The x axis is cut into tiles of width 2**level, each sampled at a fixed
+    number of points, with the level chosen so a view spans a few tiles.
+    Panning only evaluates the tiles that scroll into view, and zooming
+    back to a previous scale reuses the tiles already sampled at that
+    level. Each tile keeps its own discontinuity breaks so the assembled
+    curve can be split without a second pass.
+    """
+
+    def __init__(self, func, samples_per_tile=256, tiles_per_view=4, max_tiles=512):
+        self.func = func
+        self.samples_per_tile = samples_per_tile
+        self.tiles_per_view = tiles_per_view
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self._tiles = OrderedDict()
+
+    def level_for(self, width):
+        """Resolution level whose tile width suits a view of this width"""
+        return int(np.floor(np.log2(width / self.tiles_per_view)))
+
+    def sample(self, x_min, x_max):
+        """Return (x, y, breaks) covering [x_min, x_max] from cached tiles"""
+        level = self.level_for(x_max - x_min)
+        tile_width = 2.0 ** level
+        first, last = int(np.floor(x_min / tile_width)), int(np.floor(x_max / tile_width))
+        keys = [(level, index) for index in range(first, last + 1)]
+
+        missing = [key for key in keys if key not in self._tiles]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            self._fill(missing, tile_width)
+
+        tiles = []
+        for key in keys:
+            self._tiles.move_to_end(key)
+            tiles.append(self._tiles[key])
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+
+        x = np.concatenate([tile[0] for tile in tiles])
+        y = np.concatenate([tile[1] for tile in tiles])
+        breaks = [position for tile in tiles for position in tile[2]]
+        return x, y, breaks
+
+    def _fill(self, keys, tile_width):
+        """Sample every missing tile in one vectorised call"""
+        n = self.samples_per_tile
+        x = np.concatenate([np.linspace(index * tile_width, (index + 1) * tile_width, n, endpoint=False)
+                            for _, index in keys])
+        y = self.func(x)
+        for position, key in enumerate(keys):
+            tile_x = x[position * n:(position + 1) * n]
+            tile_y = y[position * n:(position + 1) * n]
+            breaks, _ = find_discontinuities(tile_x, tile_y, self.func)
+            self._tiles[key] = (tile_x, tile_y, breaks)
@@ -0,0 +1,334 @@
+"""Long-lived matplotlib canvas and pan/zoom controller for the function graph.
+
+One GraphCanvas lives for as long as the graph screen: each new plot resets
+its artists and updates the curves' data in place instead of building a new
+figure. Curves are drawn as animated artists so that data-only updates are
+blitted over a cached background.
+
+Dragging with the left mouse button pans the plot and the scroll wheel zooms
+about the cursor. Each curve is re-sampled from a TileCache, so only newly
+exposed x-intervals are evaluated and no symbolic analysis runs while the
+view moves.
+
+SurfaceCanvas draws z = f(x, y) from a cached SurfaceGrid as a 3D
+surface, a heatmap or contour lines.
+"""
+import numpy as np
+from PyQt5.QtCore import QTimer
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from numeric_methods import split_segments
+
+
+class GraphCanvas(FigureCanvas):
+    """Persistent figure with one or more curves plus per-plot analysis artists"""
+
+    def __init__(self, figsize=(12, 8)):
+        # A plain Figure is not registered with pyplot, so nothing leaks
+        # into pyplot's global figure list
+        super().__init__(Figure(figsize=figsize))
+        self.ax = self.figure.add_subplot(111)
+        self.ax.grid(True, alpha=0.3)
+        self.ax.set_xlabel('x', fontsize=12)
+        self.ax.set_ylabel('y', fontsize=12)
+        self.ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
+        self.ax.axvline(x=0, color='k', linestyle='-', alpha=0.3)
+        self.lines = []
+        self._artists = []
+        self._background = None
+        self.mpl_connect('draw_event', self.on_draw)
+
+    def reset(self, title, x_min, x_max, curves=1, equal_aspect=False):
+        """Remove the previous plot's artists and prepare an empty plot of curves lines
+
+        equal_aspect gives both axes the same scale, for parametric and polar curves.
+        """
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+        if self.ax.get_legend() is not None:
+            self.ax.get_legend().remove()
+        while len(self.lines) > curves:
+            self.lines.pop().remove()
+        while len(self.lines) < curves:
+            line, = self.ax.plot([], [], '-', linewidth=2, animated=True)
+            self.lines.append(line)
+        for index, line in enumerate(self.lines):
+            # A single curve keeps the familiar blue; overlays use the colour cycle
+            line.set_color('b' if curves == 1 else f'C{index % 10}')
+            line.set_data([], [])
+            line.set_label('_nolegend_')
+            line.set_animated(True)
+        self.ax.set_title(title, fontsize=14, fontweight='bold')
+        self.ax.set_aspect('equal' if equal_aspect else 'auto', adjustable='datalim')
+        self.ax.set_xlim(x_min, x_max)
+        # With equal scales, either axis may be widened to keep the aspect
+        self.ax.set_autoscalex_on(equal_aspect)
+        self.ax.set_autoscaley_on(True)
+        self.draw_idle()
+
+    def set_curve(self, x, y, label, index=0):
+        """Show a new curve and rescale the y-axis to fit every curve"""
+        self.lines[index].set_data(x, y)
+        self.lines[index].set_label(label)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view(scalex=False)
+
+    def update_curve(self, x, y, index=0):
+        """Change only a curve's data, blitting it over the cached background"""
+        self.lines[index].set_data(x, y)
+        self.blit_animated()
+
+    def update_curves(self, x, rows):
+        """Give every curve new y-values on a common x grid, blitting them"""
+        for line, y in zip(self.lines, rows):
+            line.set_data(x, y)
+        self.blit_animated()
+
+    def update_lines(self, data):
+        """Give several lines new data, {index: (x, y)}, and blit them all at once"""
+        for index, (x, y) in data.items():
+            self.lines[index].set_data(x, y)
+        self.blit_animated()
+
+    def clear_annotations(self):
+        """Remove this plot's markers and asymptote lines, keeping the curves"""
+        if not self._artists:
+            return
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+        self.refresh_legend()
+
+    def plot(self, *args, **kwargs):
+        """ax.plot for an artist that belongs to the current plot only"""
+        artists = self.ax.plot(*args, **kwargs)
+        self._artists.extend(artists)
+        return artists
+
+    def axvline(self, *args, **kwargs):
+        """ax.axvline for an artist that belongs to the current plot only"""
+        artist = self.ax.axvline(*args, **kwargs)
+        self._artists.append(artist)
+        return artist
+
+    def axhline(self, *args, **kwargs):
+        """ax.axhline for an artist that belongs to the current plot only"""
+        artist = self.ax.axhline(*args, **kwargs)
+        self._artists.append(artist)
+        return artist
+
+    def fill_between(self, *args, **kwargs):
+        """ax.fill_between for an artist that belongs to the current plot only"""
+        artist = self.ax.fill_between(*args, **kwargs)
+        self._artists.append(artist)
+        return artist
+
+    def refresh_legend(self):
+        """Rebuild the legend and schedule a full redraw"""
+        self.ax.legend(loc='best', fontsize=10)
+        self.draw_idle()
+
+    def on_draw(self, event):
+        """After a full draw, cache the background and draw the curves on top"""
+        self._background = self.copy_from_bbox(self.figure.bbox)
+        for line in self.lines:
+            if line.get_animated():
+                self.figure.draw_artist(line)
+
+    def blit_animated(self):
+        """Redraw only the curves, falling back to a full draw if needed"""
+        if self._background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self._background)
+        for line in self.lines:
+            if line.get_animated():
+                self.figure.draw_artist(line)
+        # Lines are clipped to the axes, so only that region changes on screen
+        self.blit(self.ax.bbox)
+
+    def freeze_curve(self, index):
+        """Draw a curve that will not change into the cached background
+
+        Blits then only redraw the remaining animated lines. The next reset
+        makes it animated again.
+        """
+        self.lines[index].set_animated(False)
+        self.draw_idle()
+
+    def release(self):
+        """Drop every artist and cached buffer before the canvas is destroyed"""
+        self._artists = []
+        self.lines = []
+        self._background = None
+        self.figure.clear()
+
+
+class GraphViewport:
+    """Mouse pan/zoom controller for the curves on a GraphCanvas
+
+    Inactive until one TileCache per curve is supplied with set_tile_caches.
+    Mouse events only move the limits; the curves are re-sampled and redrawn
+    at most once per FRAME_MS, however fast the events arrive.
+    """
+
+    ZOOM_STEP = 1.25
+    FRAME_MS = 16
+
+    def __init__(self, canvas, on_view_changed=None):
+        self.canvas = canvas
+        self.ax = canvas.ax
+        self.tile_caches = []
+        self.on_view_changed = on_view_changed
+        self._drag_start = None
+        self._refresh_timer = QTimer()
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.FRAME_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self._connections = [
+            canvas.mpl_connect('button_press_event', self.on_press),
+            canvas.mpl_connect('motion_notify_event', self.on_motion),
+            canvas.mpl_connect('button_release_event', self.on_release),
+            canvas.mpl_connect('scroll_event', self.on_scroll),
+        ]
+
+    def disconnect(self):
+        """Stop listening to mouse events"""
+        self._refresh_timer.stop()
+        for connection in self._connections:
+            self.canvas.mpl_disconnect(connection)
+        self._connections = []
+
+    def set_tile_caches(self, tile_caches):
+        """Re-sample curve i from tile_caches[i]; an empty list disables pan/zoom"""
+        self.tile_caches = list(tile_caches)
+        self._drag_start = None
+        self._refresh_timer.stop()
+
+    def on_press(self, event):
+        """Start a pan when the left button is pressed inside the axes"""
+        if self.tile_caches and event.inaxes is self.ax and event.button == 1:
+            self._drag_start = (event.x, event.y, self.ax.get_xlim(), self.ax.get_ylim())
+
+    def on_motion(self, event):
+        """Pan the view by the distance the mouse has moved"""
+        if self._drag_start is None:
+            return
+        x0, y0, (x_min, x_max), (y_min, y_max) = self._drag_start
+        bbox = self.ax.bbox
+        dx = (event.x - x0) / bbox.width * (x_max - x_min)
+        dy = (event.y - y0) / bbox.height * (y_max - y_min)
+        self.set_view(x_min - dx, x_max - dx, y_min - dy, y_max - dy)
+
+    def on_release(self, event):
+        """Finish the current pan"""
+        self._drag_start = None
+
+    def on_scroll(self, event):
+        """Zoom in or out about the cursor position"""
+        if not self.tile_caches or event.inaxes is not self.ax or event.xdata is None:
+            return
+        factor = 1 / self.ZOOM_STEP if event.button == 'up' else self.ZOOM_STEP
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        cx, cy = event.xdata, event.ydata
+        self.set_view(cx - (cx - x_min) * factor, cx + (x_max - cx) * factor,
+                      cy - (cy - y_min) * factor, cy + (y_max - cy) * factor)
+
+    def set_view(self, x_min, x_max, y_min, y_max):
+        """Move the view and schedule a redraw of the curves from their tile caches"""
+        self.ax.set_xlim(x_min, x_max)
+        self.ax.set_ylim(y_min, y_max)
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def refresh(self):
+        """Re-sample the curves for the current x-limits and redraw"""
+        x_min, x_max = self.ax.get_xlim()
+        for line, tile_cache in zip(self.canvas.lines, self.tile_caches):
+            x, y, breaks = tile_cache.sample(x_min, x_max)
+            line.set_data(*split_segments(x, y, breaks))
+        # The limits moved, so this needs a full draw rather than a blit
+        self.canvas.draw_idle()
+        if self.on_view_changed is not None:
+            self.on_view_changed(x_min, x_max)
+
+
+class SurfaceCanvas(FigureCanvas):
+    """Canvas for z = f(x, y) as a 3D surface, a heatmap or contour lines
+
+    The grid is only drawn, never evaluated, here. While the 3D view is
+    being rotated a decimated copy of the surface is shown instead of the
+    full one, and the full surface comes back when the mouse is released.
+    """
+
+    STYLES = ("Surface", "Heatmap", "Contours")
+    # Samples per axis drawn for the full surface and while dragging
+    SURFACE_GRID = 100
+    DRAG_GRID = 30
+    CONTOUR_LEVELS = 15
+
+    def __init__(self, figsize=(12, 8)):
+        super().__init__(Figure(figsize=figsize))
+        self.ax = None
+        self._full = None
+        self._coarse = None
+        self.mpl_connect('button_press_event', self.on_press)
+        self.mpl_connect('button_release_event', self.on_release)
+
+    def show_grid(self, grid, style, title):
+        """Replace the current plot with grid drawn in the given style"""
+        self.figure.clear()
+        self._full = self._coarse = None
+        low, high = grid.z_limits() or (-1.0, 1.0)
+        if style == "Surface":
+            self.ax = self.figure.add_subplot(111, projection='3d')
+            self._full = self._surface(grid.decimated(self.SURFACE_GRID), low, high)
+            self._coarse = self._surface(grid.decimated(self.DRAG_GRID), low, high)
+            self._coarse.set_visible(False)
+            self.ax.set_zlim(low, high)
+            self.ax.set_zlabel('z', fontsize=12)
+            mappable = self._full
+        elif style == "Heatmap":
+            self.ax = self.figure.add_subplot(111)
+            mappable = self.ax.imshow(grid.Z, extent=grid.bounds, origin='lower', aspect='auto',
+                                      cmap='viridis', vmin=low, vmax=high)
+        else:
+            self.ax = self.figure.add_subplot(111)
+            mappable = self.ax.contour(grid.X, grid.Y, grid.Z, cmap='viridis',
+                                       levels=np.linspace(low, high, self.CONTOUR_LEVELS))
+            self.ax.clabel(mappable, fontsize=8)
+            self.ax.grid(True, alpha=0.3)
+        self.figure.colorbar(mappable, ax=self.ax, shrink=0.8, label='z')
+        self.ax.set_xlabel('x', fontsize=12)
+        self.ax.set_ylabel('y', fontsize=12)
+        self.ax.set_title(title, fontsize=14, fontweight='bold')
+        self.draw_idle()
+
+    def _surface(self, grid_arrays, low, high):
+        """plot_surface of (X, Y, Z) at its own resolution, clipped to the z-range shown"""
+        X, Y, Z = grid_arrays
+        return self.ax.plot_surface(X, Y, np.clip(Z, low, high), rcount=Z.shape[0],
+                                    ccount=Z.shape[1], cmap='viridis', vmin=low, vmax=high,
+                                    linewidth=0, antialiased=False)
+
+    def on_press(self, event):
+        """Show the decimated surface while the view is rotated"""
+        if self._coarse is not None and event.inaxes is self.ax:
+            self._full.set_visible(False)
+            self._coarse.set_visible(True)
+
+    def on_release(self, event):
+        """Bring back the full surface once rotation stops"""
+        if self._coarse is not None and self._coarse.get_visible():
+            self._coarse.set_visible(False)
+            self._full.set_visible(True)
+            self.draw_idle()
+
+    def release(self):
+        """Drop every artist before the canvas is destroyed"""
+        self._full = self._coarse = None
+        self.ax = None
+        self.figure.clear()
@@ -495,6 +495,8 @@ class EducationalApp(QMainWindow):
         """Handle application close"""
         if hasattr(self, 'conn'):
             self.conn.close()
+        if hasattr(self, 'calculator'):
+            self.calculator.solver_service.shutdown()
         event.accept()
 
     def get_high_score(self, user_id, topic):
@@ -0,0 +1,345 @@
+"""Process-isolated service for symbolic SymPy calls with hard timeouts.
+
+``sp.solve`` and ``sp.limit`` can run for minutes on transcendental input,
+and a Python thread running them cannot be stopped. The service runs them in
+a small pool of worker processes instead: a call that overruns its
+wall-clock limit is abandoned by terminating its worker, which is replaced
+with a fresh one, so every call has a guaranteed worst-case latency.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+
+import sympy as sp
+
+from expression_compiler import ExpressionCompiler, ResultSummary
+
+# Seconds allowed for a freshly spawned worker to import SymPy and report ready
+STARTUP_TIMEOUT = 60.0
+
+# Seconds between checks of a call's cancel event while it runs
+CANCEL_POLL_INTERVAL = 0.02
+
+
+class SolverTimeout(Exception):
+    """Raised when a symbolic call runs past its wall-clock limit"""
+
+
+class SolverError(Exception):
+    """Raised when a symbolic call fails inside the worker process"""
+
+
+class SolverCancelled(Exception):
+    """Raised when a call is cancelled by its caller before it finishes"""
+
+
+def _solve(expr, symbol):
+    return sp.solve(expr, symbol)
+
+
+def _limit(expr, symbol, point):
+    return sp.limit(expr, symbol, point)
+
+
+def _integrate(expr, symbol):
+    return sp.integrate(expr, symbol)
+
+
+def _definite_integral(expr, symbol, a, b):
+    return sp.integrate(expr, (symbol, a, b))
+
+
+def _periodicity(expr, symbol):
+    return sp.periodicity(expr, symbol)
+
+
+# One expression compiler per worker process, so compiled formulas are reused
+_compiler = None
+
+
+def _evaluate(text, precision):
+    """ResultSummary of a calculator expression at the given precision
+
+    The summary rather than the value is sent back: it is formatted here,
+    and high-precision mpmath numbers belong to their own context, which
+    cannot be pickled.
+    """
+    global _compiler
+    if _compiler is None:
+        _compiler = ExpressionCompiler()
+    return ResultSummary(_compiler.evaluate(text, precision=precision))
+
+
+# One analyzer per worker process, so its expression cache outlives each call,
+# with the in-process solver that limits its symbolic calls
+_analyzer = None
+_inline_solver = None
+
+
+def _analyze(function_str, x_min, x_max, options, solver_timeout):
+    """FunctionAnalyzer report for one function, as a plain dict
+
+    Each symbolic solve/limit is limited to solver_timeout seconds and falls
+    back to the numeric result, as on the graph screen, so one hard
+    function cannot use up the whole call's timeout.
+    """
+    global _analyzer, _inline_solver
+    if _analyzer is None:
+        # Imported here because function_analyzer itself imports this module
+        from function_analyzer import FunctionAnalyzer
+        _inline_solver = InProcessSolver()
+        _analyzer = FunctionAnalyzer(solver=_inline_solver)
+    _inline_solver.timeout = solver_timeout
+    return _analyzer.analyze(function_str, x_min, x_max, **options).to_dict()
+
+
+# Operations a worker process may run, by name
+OPERATIONS = {
+    'solve': _solve,
+    'limit': _limit,
+    'integrate': _integrate,
+    'definite_integral': _definite_integral,
+    'periodicity': _periodicity,
+    'analyze': _analyze,
+    'evaluate': _evaluate,
+}
+
+
+def _worker_main(conn):
+    """Worker process loop: run requested operations until told to stop"""
+    try:
+        conn.send('ready')
+    except OSError:
+        # The service shut down before this worker finished starting
+        return
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        operation, args = request
+        try:
+            succeeded, value = True, OPERATIONS[operation](*args)
+        except Exception as e:
+            succeeded, value = False, f"{type(e).__name__}: {e}"
+        # A process with an abandoned symbolic call still running retires,
+        # and the service starts a fresh one in its place
+        retiring = _inline_solver is not None and _inline_solver.abandoned
+        try:
+            conn.send((succeeded, value, retiring))
+        except Exception as e:
+            # The result could not be pickled back to the caller
+            conn.send((False, f"{type(e).__name__}: {e}", retiring))
+        if retiring:
+            return
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,),
+                                       name="solver-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout=STARTUP_TIMEOUT):
+        """Wait up to timeout seconds for the process to start up; returns True once ready"""
+        if not self.ready:
+            if not self.conn.poll(max(timeout, 0)):
+                if not self.process.is_alive():
+                    raise OSError("solver worker did not start")
+                return False
+            self.conn.recv()
+            self.ready = True
+        return True
+
+    def stop(self, force=False):
+        """Stop the process, killing it if it is busy or force is set"""
+        try:
+            if not force:
+                self.conn.send(None)
+                self.process.join(0.5)
+        except (OSError, ValueError):
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+        self.conn.close()
+
+
+class _SymbolicCalls:
+    """The symbolic operations with a wall-clock limit, for a class with a call method"""
+
+    def solve(self, expr, symbol, timeout=None):
+        """sp.solve(expr, symbol) with a wall-clock limit"""
+        return self.call('solve', expr, symbol, timeout=timeout)
+
+    def limit(self, expr, symbol, point, timeout=None):
+        """sp.limit(expr, symbol, point) with a wall-clock limit"""
+        return self.call('limit', expr, symbol, point, timeout=timeout)
+
+    def integrate(self, expr, symbol, timeout=None):
+        """sp.integrate(expr, symbol) with a wall-clock limit"""
+        return self.call('integrate', expr, symbol, timeout=timeout)
+
+    def definite_integral(self, expr, symbol, a, b, timeout=None):
+        """sp.integrate(expr, (symbol, a, b)) with a wall-clock limit"""
+        return self.call('definite_integral', expr, symbol, a, b, timeout=timeout)
+
+    def periodicity(self, expr, symbol, timeout=None):
+        """sp.periodicity(expr, symbol) with a wall-clock limit"""
+        return self.call('periodicity', expr, symbol, timeout=timeout)
+
+
+class InProcessSolver(_SymbolicCalls):
+    """Symbolic calls with a wall-clock limit for code already in a worker process
+
+    Worker processes are daemons and cannot start workers of their own, so
+    each call runs on a daemon thread that is abandoned if it overruns,
+    raising SolverTimeout just like SolverService. An abandoned thread
+    keeps running, so abandoned is set and the worker process retires
+    once its current request is answered.
+    """
+
+    def __init__(self, timeout=2.0):
+        self.timeout = timeout
+        self.abandoned = False
+
+    def call(self, operation, *args, timeout=None):
+        """Run a named operation on a thread and return its result"""
+        timeout = self.timeout if timeout is None else timeout
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = OPERATIONS[operation](*args)
+            except Exception as e:
+                outcome['error'] = f"{type(e).__name__}: {e}"
+
+        thread = threading.Thread(target=run, name=f"solver-{operation}", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            self.abandoned = True
+            raise SolverTimeout(f"{operation} timed out after {timeout:g}s")
+        if 'error' in outcome:
+            raise SolverError(outcome['error'])
+        return outcome['result']
+
+
+class SolverService(_SymbolicCalls):
+    """Pool of worker processes running symbolic calls with timeouts
+
+    Workers are started lazily on first use. A call's timeout covers
+    waiting for an idle worker, that worker's startup and the operation
+    itself; if it runs out while the operation is running the busy worker
+    is terminated and replaced. Either way SolverTimeout is raised so the
+    caller can fall back to a numeric method.
+    """
+
+    def __init__(self, workers=2, timeout=2.0):
+        self.workers = workers
+        self.timeout = timeout
+        # Spawn rather than fork: forking a process that runs Qt threads is unsafe
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        # Every live worker, idle or busy, so shutdown can stop them all
+        self._all = set()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker processes if they are not already running"""
+        with self._lock:
+            if not self._started:
+                for _ in range(self.workers):
+                    self._idle.put(self._new_worker())
+                self._started = True
+
+    def _new_worker(self):
+        """Start a worker process and keep track of it"""
+        worker = _Worker(self._context)
+        self._all.add(worker)
+        return worker
+
+    def call(self, operation, *args, timeout=None, cancel=None):
+        """Run a named operation in a worker process and return its result
+
+        cancel may be a threading.Event: setting it terminates the worker
+        running the call at once and raises SolverCancelled.
+        """
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise SolverTimeout(f"{operation} timed out after {timeout:g}s waiting for a free worker")
+        try:
+            if not worker.wait_ready(deadline - time.monotonic()):
+                # Still starting up: it is not stuck, so it goes back to the pool as it is
+                self._idle.put(worker)
+                raise SolverTimeout(f"{operation} timed out after {timeout:g}s waiting for a worker to start")
+            if cancel is not None and cancel.is_set():
+                self._idle.put(worker)
+                raise SolverCancelled(f"{operation} was cancelled")
+            worker.conn.send((operation, args))
+            while not worker.conn.poll(min(CANCEL_POLL_INTERVAL, max(deadline - time.monotonic(), 0))):
+                if cancel is not None and cancel.is_set():
+                    self._recycle(worker)
+                    raise SolverCancelled(f"{operation} was cancelled")
+                if time.monotonic() >= deadline:
+                    self._recycle(worker)
+                    raise SolverTimeout(f"{operation} timed out after {timeout:g}s")
+            succeeded, value, retiring = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._recycle(worker)
+            raise SolverError(f"solver worker died: {e}")
+        if retiring:
+            self._recycle(worker)
+        else:
+            self._idle.put(worker)
+        if not succeeded:
+            raise SolverError(value)
+        return value
+
+    def _recycle(self, worker):
+        """Kill a stuck or broken worker and put a fresh one in its place"""
+        worker.stop(force=True)
+        with self._lock:
+            self._all.discard(worker)
+            if self._started:
+                self._idle.put(self._new_worker())
+
+    def evaluate(self, text, precision, timeout=None, cancel=None):
+        """ResultSummary of a calculator expression at an expression compiler precision"""
+        return self.call('evaluate', text, precision, timeout=timeout, cancel=cancel)
+
+    def analyze(self, function_str, x_min, x_max, timeout=None, solver_timeout=2.0, **options):
+        """FunctionAnalyzer.analyze(...).to_dict() run in a worker process
+
+        Each symbolic step inside is limited to solver_timeout seconds and
+        the whole call to timeout. options are passed on to analyze
+        (resolution, degrees, stages).
+        """
+        return self.call('analyze', function_str, x_min, x_max, options, solver_timeout,
+                         timeout=timeout)
+
+    def shutdown(self):
+        """Stop every worker process, terminating any still busy with a call"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait()
+                except queue.Empty:
+                    break
+            workers, self._all = self._all, set()
+            self._started = False
+        for worker in workers:
+            worker.stop()
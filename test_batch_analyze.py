@@ -0,0 +1,47 @@
+"""Tests for the batch analysis CLI"""
+import json
+
+from batch_analyze import main, completed_indices
+
+
+def write_specs(path, specs):
+    path.write_text(''.join(json.dumps(spec) + '\n' for spec in specs))
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_batch_and_resume(tmp_path):
+    specs = tmp_path / 'specs.jsonl'
+    output = tmp_path / 'out.jsonl'
+    write_specs(specs, [
+        {'function': 'x**2 - 4', 'id': 'a', 'stages': ['roots']},
+        {'function': 'import os'},
+        {'function': 'x**3 - x', 'x_min': -2, 'x_max': 2, 'stages': ['roots', 'turning_points']},
+    ])
+    assert main([str(specs), '-o', str(output), '--workers', '1']) == 1
+    records = read_records(output)
+    assert [record['index'] for record in records] == [0, 1, 2]
+    assert records[0]['id'] == 'a' and records[0]['roots'] == [-2.0, 2.0]
+    assert 'error' in records[1]
+    assert len(records[2]['turning_points']) == 2
+
+    # An interrupted run: the last record is cut off part way through
+    lines = output.read_text().splitlines(keepends=True)
+    output.write_text(lines[0] + lines[1][:10])
+    assert completed_indices(str(output)) == {0}
+    main([str(specs), '-o', str(output), '--workers', '1', '--resume'])
+    assert [record['index'] for record in read_records(output)] == [0, 1, 2]
+
+
+def test_hard_symbolic_step_falls_back_to_numeric(tmp_path):
+    specs = tmp_path / 'specs.jsonl'
+    output = tmp_path / 'out.jsonl'
+    write_specs(specs, [{'function': 'x*sin(x) - 1', 'stages': ['roots', 'domain_range']}])
+    assert main([str(specs), '-o', str(output), '--workers', '1',
+                 '--timeout', '10', '--solver-timeout', '0.5']) == 0
+    record, = read_records(output)
+    assert 'error' not in record
+    assert len(record['roots']) == 2
+    assert record['domain_range']
@@ -0,0 +1,37 @@
+"""Tests for the safe expression compiler"""
+import pytest
+import sympy as sp
+
+from expression_compiler import ExpressionCompiler, ExpressionError, EXACT, validate
+
+
+@pytest.mark.parametrize("text", [
+    "__import__('os')",
+    "import os",
+    "().__class__",
+    "(1).__class__.__bases__",
+    "x.real",
+    "open('f')",
+    "lambda: 1",
+    "[1, 2]",
+    "'a'",
+    "__builtins__",
+])
+def test_rejects_anything_but_arithmetic(text):
+    with pytest.raises(ExpressionError):
+        ExpressionCompiler().evaluate(text)
+    with pytest.raises(ExpressionError):
+        validate(text)
+
+
+def test_evaluates_in_each_precision():
+    compiler = ExpressionCompiler()
+    assert compiler.evaluate("2^10") == 1024
+    assert compiler.evaluate("sin(30)", degrees=True) == pytest.approx(0.5)
+    assert compiler.evaluate("1/3 + 1/6", precision=EXACT) == sp.Rational(1, 2)
+    assert str(compiler.evaluate("1/3", precision=30)) == "0." + "3" * 30
+
+
+def test_refuses_an_exact_result_that_is_too_long():
+    with pytest.raises(ExpressionError):
+        ExpressionCompiler().evaluate("9**9**9", precision=EXACT)
@@ -0,0 +1,47 @@
+"""Tests for FunctionAnalyzer"""
+import pytest
+
+from function_analyzer import FunctionAnalyzer
+
+
+def test_numeric_limit_rejects_an_oscillating_tail():
+    analyzer = FunctionAnalyzer()
+    # In degrees 1e4, 1e5, 1e6 and 1e7 are all 280 mod 360
+    for function in ("sin(x)", "cos(x) + 1/x"):
+        context = analyzer.context(function, -10, 10, degrees=True)
+        assert analyzer.numeric_limit(context, 1) is None
+        assert analyzer.numeric_limit(context, -1) is None
+
+
+def test_numeric_limit_of_a_settling_function():
+    analyzer = FunctionAnalyzer()
+    context = analyzer.context("x/(x + 1)", -10, 10)
+    assert float(analyzer.numeric_limit(context, 1)) == 1.0
+    context = analyzer.context("log(x)", 1, 10, degrees=False)
+    assert analyzer.numeric_limit(context, 1) is None
+
+
+def test_analyze_cubic():
+    result = FunctionAnalyzer().analyze("x**3 - 3*x", -5, 5)
+    assert result.failures == {}
+    assert result.y_intercept == 0.0
+    assert result.roots == pytest.approx([-3 ** 0.5, 0.0, 3 ** 0.5], abs=1e-9)
+    kinds = [(round(x_val, 9), kind) for x_val, _, kind in result.turning_points]
+    assert kinds == [(-1.0, "Maximum"), (1.0, "Minimum")]
+    assert result.asymptotes == []
+
+
+def test_analyze_rational_function():
+    result = FunctionAnalyzer().analyze("1/(x - 2)", -5, 5)
+    assert result.failures == {}
+    assert result.roots == []
+    assert {'type': 'vertical', 'value': 2.0} in result.asymptotes
+    assert {'type': 'horizontal', 'value': 0.0} in result.asymptotes
+
+
+def test_analyze_in_degrees_and_to_dict():
+    result = FunctionAnalyzer().analyze("sin(x)", -400, 400, stages=('roots', 'behavior'))
+    assert result.roots == pytest.approx([-360, -180, 0, 180, 360], abs=1e-9)
+    record = result.to_dict()
+    assert record['turning_points'] is None and record['failures'] == {}
+    assert any("Periodicity" in line and "360" in line for line in record['behavior'])
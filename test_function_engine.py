@@ -0,0 +1,26 @@
+"""Tests for parsing and caching in function_engine"""
+import pytest
+
+from expression_compiler import ExpressionError
+from function_engine import ExpressionCache, SurfaceGridCache
+
+
+def test_spaces_between_names_are_not_dropped():
+    cache = ExpressionCache()
+    assert str(cache.get("xy").expr) == "xy"
+    for text in ("x y", "sin x", "import os"):
+        with pytest.raises(ExpressionError):
+            cache.get(text)
+    assert ExpressionCache.normalize("x y") != ExpressionCache.normalize("xy")
+
+
+def test_insignificant_spaces_share_an_entry():
+    cache = ExpressionCache()
+    first = cache.get("x ^ 2 + 1")
+    assert cache.get("x**2+1") is first
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_surface_grid_parses_the_input_as_typed():
+    with pytest.raises(ExpressionError):
+        SurfaceGridCache().get("x y", -1, 1, -1, 1, resolution=10)
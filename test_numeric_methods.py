@@ -0,0 +1,36 @@
+"""Tests for root isolation and integration in numeric_methods"""
+import numpy as np
+import pytest
+
+from numeric_methods import root_brackets, isolate_roots, gauss_kronrod
+
+
+def test_run_of_zeros_gives_one_point():
+    # floor(x) vanishes on all of [0, 1), about 330 grid points here
+    x = np.linspace(-3, 3, 2000)
+    exact, brackets, minima = root_brackets(x, np.floor(x))
+    assert len(exact) == 1
+    assert 0 <= x[exact[0]] < 1
+
+    roots = isolate_roots(x, np.floor(x), np.floor)
+    assert len(roots) == 1
+    assert 0 <= roots[0] < 1
+
+
+def test_separate_zeros_are_kept():
+    x = np.linspace(-2, 2, 401)
+    y = np.where(np.abs(x) < 1e-9, 0.0, x * (x - 1) * (x + 1))
+    exact, brackets, minima = root_brackets(x, y)
+    assert len(exact) == 3
+
+    roots = isolate_roots(x, y, lambda t: t * (t - 1) * (t + 1))
+    np.testing.assert_allclose(roots, [-1, 0, 1], atol=1e-12)
+
+
+def test_gauss_kronrod_known_integrals():
+    value, error = gauss_kronrod(np.sin, 0, np.pi)
+    assert value == pytest.approx(2, abs=1e-12) and error < 1e-9
+    # Integrable singularity at an end: the integral of 1/sqrt(x) over [0, 1] is 2
+    value, error = gauss_kronrod(lambda t: 1 / np.sqrt(t), 0, 1)
+    assert value == pytest.approx(2, rel=1e-8)
+    assert gauss_kronrod(np.exp, 1, 1) == (0.0, 0.0)
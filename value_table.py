@@ -0,0 +1,116 @@
+"""Value tables for the Function Explorer.
+
+A table of f(x) over start, start + step, ... up to stop is computed in one
+vectorised call of the compiled function and shown through a Qt model that
+only formats the rows the view asks for, so a million-row table costs no
+more to display than a ten-row one. CSV export writes the table in chunks
+on a background thread.
+"""
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QThread, pyqtSignal
+
+# Most rows a value table may have
+MAX_ROWS = 1_000_000
+
+# Rows formatted and written per chunk when exporting
+EXPORT_CHUNK_ROWS = 65536
+
+
+def table_grid(start, stop, step):
+    """x values start, start + step, ... not going past stop
+
+    Each value is computed as start + i * step, so rounding does not build
+    up over a long table. Raises ValueError for a step of zero or the wrong
+    sign, or a table longer than MAX_ROWS.
+    """
+    if step == 0 or not np.isfinite([start, stop, step]).all():
+        raise ValueError("Start, stop and step must be numbers, with a non-zero step")
+    if (stop - start) / step < 0:
+        raise ValueError("The step must go from start towards stop")
+    # A small allowance keeps stop itself when it is a whole number of steps away
+    rows = int(np.floor((stop - start) / step * (1 + 1e-12) + 1e-9)) + 1
+    if rows > MAX_ROWS:
+        raise ValueError(f"That table would have {rows:,} rows; the limit is {MAX_ROWS:,}")
+    return start + step * np.arange(rows)
+
+
+def format_value(value):
+    """Table text for one value"""
+    return f"{value:.10g}" if np.isfinite(value) else "undefined"
+
+
+class ValueTableModel(QAbstractTableModel):
+    """Read-only model over the x and f(x) arrays of a value table
+
+    Cells are formatted on demand, so only the rows on screen are ever
+    turned into text.
+    """
+
+    def __init__(self, x=None, y=None, function_str='f(x)'):
+        super().__init__()
+        self.set_table(np.array([]) if x is None else x, np.array([]) if y is None else y,
+                       function_str)
+
+    def set_table(self, x, y, function_str='f(x)'):
+        """Replace the table's contents"""
+        self.beginResetModel()
+        self.columns = (x, y)
+        self.headers = ("x", f"f(x) = {function_str}")
+        self.endResetModel()
+
+    def rowCount(self, parent=None):
+        return len(self.columns[0])
+
+    def columnCount(self, parent=None):
+        return 2
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return format_value(self.columns[index.column()][index.row()])
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+
+def export_csv(path, x, y, header=("x", "f(x)"), chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write the table to a CSV file one chunk at a time; returns the row count"""
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(header) + '\n')
+        for start in range(0, len(x), chunk_rows):
+            chunk = np.column_stack([x[start:start + chunk_rows], y[start:start + chunk_rows]])
+            # One %-format call per chunk; undefined and infinite values become empty cells
+            chunk = np.where(np.isfinite(chunk), chunk, np.nan)
+            text = ('%.15g,%.15g\n' * len(chunk)) % tuple(chunk.ravel())
+            f.write(text.replace('nan', ''))
+    return len(x)
+
+
+class CsvExportWorker(QThread):
+    """Runs export_csv off the GUI thread, reporting the outcome by signal"""
+
+    export_finished = pyqtSignal(str, int)
+    export_failed = pyqtSignal(str)
+
+    def __init__(self, path, x, y, header=("x", "f(x)")):
+        super().__init__()
+        self.path = path
+        self.x = x
+        self.y = y
+        self.header = header
+
+    def run(self):
+        try:
+            rows = export_csv(self.path, self.x, self.y, self.header)
+        except OSError as e:
+            self.export_failed.emit(str(e))
+            return
+        self.export_finished.emit(self.path, rows)